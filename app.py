@@ -1,338 +1,136 @@
 import streamlit as st
-import feedparser
-import requests
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
-import sqlite3
-import hashlib
 from datetime import datetime, timedelta
-import re
-from urllib.parse import urljoin, urlparse
-import json
-import time
-import warnings
-
-# Suppress XML parsing warning
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+import io
+from news_to_text import health, metrics, storage
+from news_to_text.articles import Article, load_articles
+from news_to_text.dedup import cluster_articles
+from news_to_text.feed_list import export_csv, export_opml, guess_format, import_feeds, read_feed_list
+from news_to_text.feeds import get_rss_url, refresh_feeds
+from news_to_text.fulltext import fetch_article_bodies
+from news_to_text.script import WRITERS, TextWriter, iter_script_segments, render_script
+from news_to_text.timeline import merge_timeline, window_start
 
 # Initialize session state
-if 'selected_articles' not in st.session_state:
-    st.session_state.selected_articles = []
+if 'selected_ids' not in st.session_state:
+    # Selected article IDs (url_hash) in the order they were picked
+    st.session_state.selected_ids = {}
+    st.session_state.articles_by_id = {}
 if 'news_script' not in st.session_state:
     st.session_state.news_script = ""
+    st.session_state.script_segments = []
 if 'active_sources' not in st.session_state:
     st.session_state.active_sources = []
 
-# Known RSS feeds for major sites
-KNOWN_RSS_FEEDS = {
-    'bbc.com': 'http://feeds.bbci.co.uk/news/rss.xml',
-    'bbc.co.uk': 'http://feeds.bbci.co.uk/news/rss.xml',
-    'reuters.com': 'https://www.reutersagency.com/feed/?best-topics=business-finance&post_type=best',
-    'cnn.com': 'http://rss.cnn.com/rss/cnn_topstories.rss',
-    'nytimes.com': 'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml',
-    'theguardian.com': 'https://www.theguardian.com/rss',
-    'washingtonpost.com': 'https://feeds.washingtonpost.com/rss/world',
-    'apnews.com': 'https://rsshub.app/apnews/topics/apf-topnews',
-    'npr.org': 'https://feeds.npr.org/1001/rss.xml',
-    'foxnews.com': 'https://moxie.foxnews.com/google-publisher/latest.xml',
-    'wsj.com': 'https://feeds.a.dj.com/rss/RSSWorldNews.xml',
-    'techcrunch.com': 'https://techcrunch.com/feed/',
-    'wired.com': 'https://www.wired.com/feed/rss',
-    'arstechnica.com': 'http://feeds.arstechnica.com/arstechnica/index',
-    'theverge.com': 'https://www.theverge.com/rss/index.xml',
-    'bloomberg.com': 'https://feeds.bloomberg.com/markets/news.rss',
-    'ft.com': 'https://www.ft.com/?format=rss',
-    'economist.com': 'https://www.economist.com/rss',
-}
-
-# Database setup with datetime adapter fix
-def adapt_datetime(ts):
-    return ts.isoformat()
-
-def convert_datetime(ts):
-    return datetime.fromisoformat(ts.decode())
+# Search time windows, in days
+SEARCH_WINDOWS = {'Any time': None, 'Past day': 1, 'Past week': 7, 'Past month': 30}
 
-sqlite3.register_adapter(datetime, adapt_datetime)
-sqlite3.register_converter("timestamp", convert_datetime)
-
-def init_db():
-    conn = sqlite3.connect('rss_feeds.db', detect_types=sqlite3.PARSE_DECLTYPES)
-    c = conn.cursor()
-    
-    # Create tables if they don't exist
-    c.execute('''CREATE TABLE IF NOT EXISTS rss_feeds
-                 (domain TEXT PRIMARY KEY, 
-                  rss_url TEXT,
-                  display_name TEXT,
-                  last_checked TIMESTAMP,
-                  last_success TIMESTAMP,
-                  is_active INTEGER DEFAULT 0)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS article_cache
-                 (url_hash TEXT PRIMARY KEY,
-                  url TEXT,
-                  title TEXT,
-                  content TEXT,
-                  summary TEXT,
-                  published TIMESTAMP,
-                  fetched TIMESTAMP)''')
-    
-    # Check if we need to add new columns to existing database
-    c.execute("PRAGMA table_info(rss_feeds)")
-    columns = [column[1] for column in c.fetchall()]
-    
-    # Add missing columns
-    if 'display_name' not in columns:
-        c.execute("ALTER TABLE rss_feeds ADD COLUMN display_name TEXT")
-        # Update existing rows with a default display name
-        c.execute("UPDATE rss_feeds SET display_name = domain WHERE display_name IS NULL")
-    
-    if 'is_active' not in columns:
-        c.execute("ALTER TABLE rss_feeds ADD COLUMN is_active INTEGER DEFAULT 0")
-    
-    conn.commit()
-    conn.close()
+# Timeline windows, in hours, and the most articles shown
+TIMELINE_WINDOWS = {'Past hour': 1, 'Past 2 hours': 2, 'Past 6 hours': 6, 'Past day': 24,
+                    'Past week': 24 * 7}
+TIMELINE_LIMIT = 200
 
-# Get all cached feeds
-def get_cached_feeds():
-    conn = sqlite3.connect('rss_feeds.db', detect_types=sqlite3.PARSE_DECLTYPES)
-    c = conn.cursor()
-    try:
-        c.execute("""SELECT domain, rss_url, display_name, last_success, is_active 
-                     FROM rss_feeds 
-                     WHERE rss_url IS NOT NULL 
-                     ORDER BY display_name""")
-        feeds = c.fetchall()
-    except sqlite3.OperationalError:
-        # If there's an error, return empty list
-        feeds = []
-    conn.close()
-    return feeds
+# Keep the article list, its story clusters and the ID index together.
+# The session holds compact records; article text stays in the store.
+def set_articles(articles):
+    records = {article['url_hash']: Article.from_dict(article) for article in articles}
+    st.session_state.all_articles = list(records.values())
+    st.session_state.stories = [[records[article['url_hash']] for article in story]
+                                for story in cluster_articles(articles)]
+    # Selected articles stay resolvable after they drop out of the list
+    previous = st.session_state.articles_by_id
+    by_id = {article_id: previous[article_id] for article_id in st.session_state.selected_ids
+             if article_id in previous}
+    by_id.update(records)
+    st.session_state.articles_by_id = by_id
 
-# Update feed active status
-def update_feed_active_status(domain, is_active):
-    conn = sqlite3.connect('rss_feeds.db', detect_types=sqlite3.PARSE_DECLTYPES)
-    c = conn.cursor()
-    c.execute("UPDATE rss_feeds SET is_active = ? WHERE domain = ?", (is_active, domain))
-    conn.commit()
-    conn.close()
+# The selected articles, in selection order, with their text loaded from the store
+def selected_articles():
+    by_id = st.session_state.articles_by_id
+    return load_articles([by_id[article_id] for article_id in st.session_state.selected_ids
+                          if article_id in by_id])
 
-# Find RSS feed from website
-def find_rss_feed(url):
-    """Attempt to find RSS feed URL from a website"""
-    try:
-        # Clean up domain
-        domain = urlparse(url).netloc or url
-        domain = domain.replace('www.', '')
-        
-        # Check known feeds first
-        if domain in KNOWN_RSS_FEEDS:
-            return KNOWN_RSS_FEEDS[domain]
-        
-        # Ensure URL has protocol
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        response = requests.get(url, timeout=10, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Look for RSS links in <link> tags
-        rss_links = []
-        for link in soup.find_all('link', type=['application/rss+xml', 'application/atom+xml']):
-            if link.get('href'):
-                rss_links.append(urljoin(url, link['href']))
-        
-        # Look for RSS links in page content
-        if not rss_links:
-            for a in soup.find_all('a', href=True):
-                href = a['href'].lower()
-                if any(term in href for term in ['rss', 'feed', 'atom', 'xml']):
-                    if any(term in href for term in ['.xml', '/rss', '/feed', '/atom']):
-                        full_url = urljoin(url, a['href'])
-                        rss_links.append(full_url)
-        
-        # Try common RSS paths
-        if not rss_links:
-            common_paths = ['/rss', '/feed', '/rss.xml', '/feed.xml', '/atom.xml', 
-                          '/index.xml', '/feeds', '/blog/feed', '/news/rss',
-                          '/rss/news', '/feed/news', '/?feed=rss2', '/feed.rss']
-            base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-            
-            for path in common_paths:
-                try:
-                    test_url = urljoin(base_url, path)
-                    test_response = requests.get(test_url, timeout=5, headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    })
-                    if test_response.status_code == 200:
-                        content_type = test_response.headers.get('content-type', '').lower()
-                        if any(term in content_type for term in ['xml', 'rss', 'atom']):
-                            rss_links.append(test_url)
-                            break
-                except:
-                    continue
-        
-        # Validate RSS links
-        valid_rss = None
-        for rss_url in rss_links[:3]:  # Check first 3 candidates
-            try:
-                feed = feedparser.parse(rss_url)
-                if feed.entries:
-                    valid_rss = rss_url
-                    break
-            except:
-                continue
-        
-        return valid_rss
-    
-    except Exception as e:
-        st.error(f"Error finding RSS feed: {str(e)}")
-        return None
+# Sidebar badge and tooltip for a feed's health
+HEALTH_BADGES = {health.HEALTHY: "🟢", health.DEGRADED: "🟡", health.HALF_OPEN: "🟠", health.OPEN: "🔴"}
 
-# Get or fetch RSS URL
-def get_rss_url(domain):
-    conn = sqlite3.connect('rss_feeds.db', detect_types=sqlite3.PARSE_DECLTYPES)
-    c = conn.cursor()
-    
-    # Clean domain
-    clean_domain = domain.replace('http://', '').replace('https://', '').replace('www.', '')
-    
-    # Check cache
-    c.execute("SELECT rss_url, last_checked FROM rss_feeds WHERE domain = ?", (clean_domain,))
-    result = c.fetchone()
-    
-    if result and result[0]:
-        # If checked within last 7 days, use cached
-        if result[1]:
-            last_checked = result[1]
-            if datetime.now() - last_checked < timedelta(days=7):
-                conn.close()
-                return result[0]
-    
-    # Find RSS feed
-    rss_url = find_rss_feed(domain)
-    
-    # Determine display name
-    display_name = clean_domain.replace('.com', '').replace('.org', '').replace('.net', '').title()
-    
-    # Update cache
-    if rss_url:
-        c.execute("""INSERT OR REPLACE INTO rss_feeds 
-                     (domain, rss_url, display_name, last_checked, last_success) 
-                     VALUES (?, ?, ?, ?, ?)""", 
-                  (clean_domain, rss_url, display_name, datetime.now(), datetime.now()))
-    else:
-        c.execute("""INSERT OR REPLACE INTO rss_feeds 
-                     (domain, rss_url, display_name, last_checked) 
-                     VALUES (?, ?, ?, ?)""", 
-                  (clean_domain, None, display_name, datetime.now()))
-    
-    conn.commit()
-    conn.close()
-    return rss_url
+def health_badge(feed_health, last_success):
+    failures, last_error, avg_latency, retry_after = feed_health
+    if not failures and avg_latency is None and last_success is None:
+        return "⚪", "Not fetched yet"
+    state = health.state(failures, retry_after, datetime.now())
+    details = [f"Status: {state}"]
+    if avg_latency is not None:
+        details.append(f"Average fetch time: {avg_latency:.1f}s")
+    if failures:
+        details.append(f"Failed {failures} times in a row: {last_error}")
+    if state == health.OPEN:
+        details.append(f"Skipped until {retry_after:%H:%M}")
+    return HEALTH_BADGES[state], "  \n".join(details)
 
-# Fetch articles from RSS feed
-def fetch_articles(rss_url, limit=20):
-    try:
-        feed = feedparser.parse(rss_url)
-        
-        if not feed.entries:
-            return []
-        
-        articles = []
-        for entry in feed.entries[:limit]:
-            article = {
-                'title': entry.get('title', 'No title'),
-                'url': entry.get('link', ''),
-                'published': entry.get('published', entry.get('updated', '')),
-                'summary': entry.get('summary', ''),
-                'content': ''
-            }
-            
-            # Try to get full content
-            if 'content' in entry:
-                article['content'] = entry.content[0].value
-            elif 'description' in entry:
-                article['content'] = entry.description
-            
-            # Clean HTML from content
-            if article['content']:
-                soup = BeautifulSoup(article['content'], 'html.parser')
-                article['content'] = soup.get_text(separator=' ', strip=True)
+# Sidebar panel with the timings collected by news_to_text.metrics
+def show_diagnostics():
+    with st.sidebar:
+        with st.expander("🩺 Diagnostics"):
+            collect = st.toggle("Collect timings", value=metrics.is_enabled(),
+                                help="Time each stage of fetching, parsing, storage and summarizing")
+            if collect != metrics.is_enabled():
+                if collect:
+                    metrics.enable()
+                else:
+                    metrics.disable()
+                st.rerun()
+            st.checkbox("Profile the next fetch", key="profile_fetch")
             
-            # Clean summary too
-            if article['summary']:
-                soup = BeautifulSoup(article['summary'], 'html.parser')
-                article['summary'] = soup.get_text(separator=' ', strip=True)
+            data = metrics.snapshot()
+            if data['stages']:
+                st.caption("Stages")
+                st.dataframe([
+                    {'stage': stage, 'calls': stats['count'],
+                     'total ms': round(stats['total_s'] * 1000, 1),
+                     'mean ms': round(stats['mean_s'] * 1000, 2),
+                     'max ms': round(stats['max_s'] * 1000, 1)}
+                    for stage, stats in data['stages'].items()
+                ], hide_index=True)
+            if data['counters']:
+                st.caption("Counters")
+                st.dataframe([{'counter': name, 'total': total}
+                              for name, total in data['counters'].items()], hide_index=True)
+            if data['feeds']:
+                st.caption("Feeds (latest fetch)")
+                st.dataframe([
+                    {'feed': url, 'ms': round((feed['seconds'] or 0) * 1000),
+                     'KB': round((feed['bytes'] or 0) / 1024, 1), 'entries': feed['entries'],
+                     'status': feed['status'], 'errors': feed['errors'], 'error': feed['error']}
+                    for url, feed in data['feeds'].items()
+                ], hide_index=True)
+            if data['stages'] or data['counters'] or data['feeds']:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.download_button("Prometheus", metrics.to_prometheus(),
+                                       file_name="news_to_text_metrics.txt", mime="text/plain")
+                with col2:
+                    if st.button("Reset"):
+                        metrics.reset()
+                        st.rerun()
+            elif collect:
+                st.caption("Fetch some articles to see timings.")
             
-            articles.append(article)
-        
-        return articles
-    except Exception as e:
-        st.error(f"Error fetching articles from {rss_url}: {str(e)}")
-        return []
+            if st.session_state.get('profile_report'):
+                st.caption("Profile of the last fetch")
+                st.code(st.session_state.profile_report)
 
-# Generate summary (simplified version)
-def generate_summary(text, max_sentences=3):
-    """Simple extractive summarization"""
-    if not text:
-        return ""
-    
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-    
-    if len(sentences) <= max_sentences:
-        return ' '.join(sentences) + '.'
-    
-    # Simple scoring based on word frequency
-    word_freq = {}
-    for sentence in sentences:
-        words = sentence.lower().split()
-        for word in words:
-            if len(word) > 3:  # Skip short words
-                word_freq[word] = word_freq.get(word, 0) + 1
-    
-    # Score sentences
-    sentence_scores = {}
-    for sentence in sentences:
-        score = 0
-        words = sentence.lower().split()
-        for word in words:
-            score += word_freq.get(word, 0)
-        sentence_scores[sentence] = score / len(words) if words else 0
-    
-    # Get top sentences
-    top_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:max_sentences]
-    top_sentences = sorted(top_sentences, key=lambda x: sentences.index(x[0]))
-    
-    return ' '.join([s[0] for s in top_sentences]) + '.'
+# Headline, summary and date of one article
+def show_article(article):
+    st.markdown(f"**{article['title']}**")
+    if article['summary']:
+        st.caption(article['summary'][:200] + "...")
+    if article['published']:
+        st.caption(f"Published: {article['published']}")
 
-# Generate news script
-def generate_news_script(articles):
-    """Generate a news readout script from selected articles"""
-    script = f"Good evening, and welcome to the news. Today is {datetime.now().strftime('%B %d, %Y')}.\n\n"
-    script += f"In today's bulletin, we have {len(articles)} stories for you.\n\n"
-    
-    for i, article in enumerate(articles, 1):
-        script += f"--- Story {i} ---\n\n"
-        script += f"{article['title']}\n\n"
-        
-        # Use content or summary
-        content = article.get('content', '') or article.get('summary', '')
-        if content:
-            summary = generate_summary(content)
-            script += summary
-        else:
-            script += "Details are still emerging on this story."
-        
-        script += "\n\n"
-        
-        if i < len(articles):
-            script += "Moving on to our next story...\n\n"
-    
-    script += "That concludes our news bulletin for today. Thank you for listening."
-    
-    return script
+# Read-only view of one source's articles while other feeds are still loading
+def show_source_preview(source, articles):
+    with st.expander(f"📰 {source} ({len(articles)} articles)", expanded=True):
+        for article in articles[:10]:  # Limit display
+            show_article(article)
 
 # Streamlit UI
 def main():
@@ -342,36 +140,43 @@ def main():
     st.markdown("Transform news sources into broadcast-ready scripts")
     
     # Initialize database
-    init_db()
+    storage.init_db()
     
     # Sidebar for news sources
     with st.sidebar:
         st.header("News Sources")
         
         # Show cached feeds
-        cached_feeds = get_cached_feeds()
+        cached_feeds = storage.get_cached_feeds()
         if cached_feeds:
             st.subheader("Available Sources")
             st.caption("Select sources to include in your bulletin:")
             
+            # Checkbox changes are written together after the loop
+            active_changes = {}
+            feed_health = storage.get_feed_health([feed[0] for feed in cached_feeds])
             for domain, rss_url, display_name, last_success, is_active in cached_feeds:
                 # Initialize active sources
                 if is_active and domain not in st.session_state.active_sources:
                     st.session_state.active_sources.append(domain)
                 
-                # Checkbox for each source
+                # Checkbox for each source, with its health badge
+                badge, status = health_badge(feed_health.get(domain, (0, None, None, None)),
+                                             last_success)
                 checked = st.checkbox(
-                    display_name or domain,
+                    f"{badge} {display_name or domain}",
                     value=domain in st.session_state.active_sources,
-                    key=f"source_{domain}"
+                    key=f"source_{domain}",
+                    help=status
                 )
                 
                 if checked and domain not in st.session_state.active_sources:
                     st.session_state.active_sources.append(domain)
-                    update_feed_active_status(domain, 1)
+                    active_changes[domain] = 1
                 elif not checked and domain in st.session_state.active_sources:
                     st.session_state.active_sources.remove(domain)
-                    update_feed_active_status(domain, 0)
+                    active_changes[domain] = 0
+            storage.set_feeds_active(active_changes)
             
             st.divider()
         
@@ -394,6 +199,42 @@ def main():
                         st.rerun()
                     else:
                         st.error(f"❌ Could not find RSS feed for {new_source}")
+        
+        # Bulk import and export of the source list
+        with st.expander("📂 Import / Export Sources"):
+            uploaded = st.file_uploader("OPML or CSV file", type=["opml", "xml", "csv"])
+            activate = st.checkbox("Activate imported sources")
+            if uploaded and st.button("Import Sources"):
+                try:
+                    entries = read_feed_list(uploaded.getvalue(), guess_format(uploaded.name))
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                    entries = []
+                progress_bar = st.progress(0, text="Checking sources...")
+                report = []
+                for i, (entry, error) in enumerate(
+                        import_feeds(entries, activate=True if activate else None), 1):
+                    progress_bar.progress(i / len(entries), text="Checking sources...")
+                    report.append({'source': entry['domain'], 'ok': not error,
+                                   'feed / error': error or entry['rss_url']})
+                progress_bar.empty()
+                st.session_state.import_report = report
+                st.rerun()
+            
+            if st.session_state.get('import_report'):
+                report = st.session_state.import_report
+                imported = sum(row['ok'] for row in report)
+                st.caption(f"Imported {imported} of {len(report)} sources")
+                st.dataframe(sorted(report, key=lambda row: row['ok']), hide_index=True)
+            
+            if cached_feeds:
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.download_button("OPML", export_opml(cached_feeds),
+                                       file_name="news_to_text_sources.opml", mime="text/x-opml")
+                with col2:
+                    st.download_button("CSV", export_csv(cached_feeds),
+                                       file_name="news_to_text_sources.csv", mime="text/csv")
     
     # Main content area
     if not st.session_state.active_sources:
@@ -412,91 +253,203 @@ def main():
     # Display active sources
     st.markdown(f"**Active sources:** {', '.join(st.session_state.active_sources)}")
     
+    fetch_col, stored_col = st.columns([1, 1])
+    with stored_col:
+        # Articles kept fresh by `news-to-text poll` load instantly from the store
+        if st.button("📥 Load Stored Articles"):
+            set_articles(storage.load_stored_articles(st.session_state.active_sources))
+    
     # Fetch articles button
-    if st.button("🔄 Fetch Latest Articles", type="primary"):
-        with st.spinner("Fetching articles..."):
-            all_articles = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for i, source in enumerate(st.session_state.active_sources):
-                status_text.text(f"Fetching from {source}...")
-                progress_bar.progress((i + 1) / len(st.session_state.active_sources))
-                
-                # Get RSS URL from cache
-                conn = sqlite3.connect('rss_feeds.db', detect_types=sqlite3.PARSE_DECLTYPES)
-                c = conn.cursor()
-                c.execute("SELECT rss_url FROM rss_feeds WHERE domain = ?", (source,))
-                result = c.fetchone()
-                conn.close()
+    with fetch_col:
+        fetch_clicked = st.button("🔄 Fetch Latest Articles", type="primary")
+    if fetch_clicked:
+        all_articles = []
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        # Resolve RSS URLs from cache
+        feeds = storage.get_feed_urls(st.session_state.active_sources)
+        
+        # One slot per source, in sidebar order, filled in as each feed arrives
+        slots = {}
+        for source, _ in feeds:
+            slots[source] = st.empty()
+            slots[source].caption(f"⏳ {source}: still loading...")
+        
+        results = {}
+        profile_report = io.StringIO() if st.session_state.get('profile_fetch') else None
+        with metrics.profile(stream=profile_report) if profile_report else metrics.timer('app.fetch'):
+            for i, (source, articles, error) in enumerate(refresh_feeds(feeds), 1):
+                status_text.text(f"Fetched {source} ({i}/{len(feeds)})")
+                progress_bar.progress(i / len(feeds))
                 
-                if result and result[0]:
-                    articles = fetch_articles(result[0])
-                    for article in articles:
-                        article['source'] = source
-                    all_articles.extend(articles)
-            
-            st.session_state.all_articles = all_articles
-            progress_bar.empty()
-            status_text.empty()
-            
-            if all_articles:
-                st.success(f"Fetched {len(all_articles)} articles!")
-            else:
-                st.warning("No articles found. Try different sources.")
+                if error:
+                    slots.pop(source).error(f"Error fetching articles from {source}: {error}")
+                else:
+                    with slots[source].container():
+                        show_source_preview(source, articles)
+                results[source] = articles
+        if profile_report:
+            st.session_state.profile_report = profile_report.getvalue()
+            st.session_state.profile_fetch = False
+        
+        # Keep the sidebar order regardless of which feed finished first
+        for source, _ in feeds:
+            all_articles.extend(results.get(source, []))
+        
+        # The previews give way to the full, selectable list below
+        set_articles(all_articles)
+        for slot in slots.values():
+            slot.empty()
+        progress_bar.empty()
+        status_text.empty()
+        
+        if all_articles:
+            st.success(f"Fetched {len(all_articles)} articles!")
+        else:
+            st.warning("No articles found. Try different sources.")
+    
+    # Show what's already in the article store until the next fetch
+    if 'all_articles' not in st.session_state:
+        set_articles(storage.load_stored_articles(st.session_state.active_sources))
+    
+    # Search everything in the article store, not just the latest articles
+    with st.expander("🔎 Search Stored Articles"):
+        search_col, window_col = st.columns([3, 1])
+        with search_col:
+            query = st.text_input("Search", placeholder="e.g. election results")
+        with window_col:
+            window = st.selectbox("Fetched", list(SEARCH_WINDOWS))
+        all_sources = [feed[0] for feed in cached_feeds]
+        search_sources = st.multiselect(
+            "Sources", all_sources,
+            default=[source for source in st.session_state.active_sources if source in all_sources],
+            help="Leave empty to search every source"
+        )
+        
+        if query:
+            days = SEARCH_WINDOWS[window]
+            matches = storage.search_articles(
+                query, search_sources,
+                since=datetime.now() - timedelta(days=days) if days else None
+            )
+            st.caption(f"{len(matches)} matching articles")
+            for article in matches:
+                st.markdown(f"**[{article['title']}]({article['url']})** · {article['source']}")
+                if article['summary']:
+                    st.caption(article['summary'][:200] + "...")
+    
+    # Everything published recently across sources, newest first
+    with st.expander("🕒 Timeline"):
+        window_col, scope_col = st.columns([1, 2])
+        with window_col:
+            hours = TIMELINE_WINDOWS[st.selectbox("Published", list(TIMELINE_WINDOWS))]
+        with scope_col:
+            listed_only = st.toggle("Only the articles listed below",
+                                    help="Merge the current list in memory instead of "
+                                         "querying every stored article")
+        since = window_start(hours)
+        if listed_only:
+            by_source = {}
+            for article in st.session_state.get('all_articles', []):
+                by_source.setdefault(article.source, []).append(article)
+            timeline = merge_timeline(by_source, since, limit=TIMELINE_LIMIT)
+        else:
+            timeline = storage.get_timeline(since, domains=st.session_state.active_sources,
+                                            limit=TIMELINE_LIMIT)
+        st.caption(f"{len(timeline)} articles")
+        for article in timeline:
+            published = datetime.fromtimestamp(article['published_ts'])
+            st.markdown(f"`{published:%a %H:%M}` **[{article['title']}]({article['url']})** · "
+                        f"{article['source']}")
     
     # Display articles for selection
     if 'all_articles' in st.session_state and st.session_state.all_articles:
         st.header("Select Articles for Your Bulletin")
         
-        # Group articles by source
-        articles_by_source = {}
-        for article in st.session_state.all_articles:
-            source = article['source']
-            if source not in articles_by_source:
-                articles_by_source[source] = []
-            articles_by_source[source].append(article)
+        # Group stories by the source of their representative article
+        stories_by_source = {}
+        for story in st.session_state.stories:
+            source = story[0].source
+            if source not in stories_by_source:
+                stories_by_source[source] = []
+            stories_by_source[source].append(story)
         
-        # Display articles
-        for source, articles in articles_by_source.items():
-            with st.expander(f"📰 {source} ({len(articles)} articles)", expanded=True):
-                for article in articles[:10]:  # Limit display
+        # Display one entry per story; selecting it selects every copy
+        selected_stories = 0
+        for source, stories in stories_by_source.items():
+            with st.expander(f"📰 {source} ({len(stories)} stories)", expanded=True):
+                for story in stories[:10]:  # Limit display
+                    article = story[0]
                     col1, col2 = st.columns([1, 4])
                     
                     with col1:
-                        # Create unique key for checkbox
-                        article_key = hashlib.md5(f"{article['url']}{article['title']}".encode()).hexdigest()
-                        selected = st.checkbox("Select", key=f"select_{article_key}")
+                        selected = st.checkbox("Select", key=f"select_{article.id}")
                         
-                        if selected and article not in st.session_state.selected_articles:
-                            st.session_state.selected_articles.append(article)
-                        elif not selected and article in st.session_state.selected_articles:
-                            st.session_state.selected_articles.remove(article)
+                        selected_ids = st.session_state.selected_ids
+                        for member in story:
+                            if selected:
+                                selected_ids.setdefault(member.id, None)
+                            else:
+                                selected_ids.pop(member.id, None)
+                        selected_stories += selected
                     
                     with col2:
-                        st.markdown(f"**{article['title']}**")
-                        if article['summary']:
-                            st.caption(article['summary'][:200] + "...")
-                        if article['published']:
-                            st.caption(f"Published: {article['published']}")
+                        show_article(article)
+                        if len(story) > 1:
+                            others = ', '.join(dict.fromkeys(member.source for member in story[1:]))
+                            st.caption(f"Also reported by: {others}")
         
         # Generate script section
-        if st.session_state.selected_articles:
-            st.header(f"Generate Script ({len(st.session_state.selected_articles)} articles selected)")
+        if st.session_state.selected_ids:
+            st.header(f"Generate Script ({selected_stories} stories selected)")
             
             col1, col2 = st.columns([1, 1])
             with col1:
-                if st.button("🎙️ Generate News Script", type="primary"):
-                    with st.spinner("Generating script..."):
-                        script = generate_news_script(st.session_state.selected_articles)
-                        st.session_state.news_script = script
+                generate_clicked = st.button("🎙️ Generate News Script", type="primary")
+                full_text = st.checkbox("Use full article text",
+                                        help="Download each selected article's page and summarize "
+                                             "its full text instead of the feed's teaser")
             
             with col2:
                 if st.button("🗑️ Clear Selection"):
-                    st.session_state.selected_articles = []
+                    st.session_state.selected_ids = {}
                     st.session_state.news_script = ""
+                    st.session_state.script_segments = []
                     st.rerun()
             
+            if generate_clicked:
+                articles = selected_articles()
+                if full_text:
+                    # Pages fetched before come straight from the article store
+                    progress_bar = st.progress(0, text="Fetching full articles...")
+                    failed = []
+                    for i, (article, error) in enumerate(fetch_article_bodies(articles), 1):
+                        progress_bar.progress(i / len(articles), text="Fetching full articles...")
+                        if error:
+                            failed.append(article['title'])
+                    progress_bar.empty()
+                    if failed:
+                        st.warning(f"Couldn't fetch {len(failed)} of {len(articles)} articles, "
+                                   f"so their feed text is used: {', '.join(failed[:5])}"
+                                   + ("..." if len(failed) > 5 else ""))
+                
+                # Show the script as it is written, each segment in its own
+                # element so only the new one is sent to the browser
+                placeholder = st.empty()
+                preview = placeholder.container()
+                segments, parts = [], []
+                with metrics.timer('app.generate'):
+                    for segment in iter_script_segments(articles):
+                        part = io.StringIO()
+                        TextWriter(part).write(segment)
+                        segments.append(segment)
+                        parts.append(part.getvalue())
+                        preview.text(parts[-1])
+                placeholder.empty()
+                st.session_state.news_script = ''.join(parts)
+                st.session_state.script_segments = segments
+            
             # Display generated script
             if st.session_state.news_script:
                 st.subheader("Generated News Script")
@@ -511,11 +464,13 @@ def main():
                 # Download options
                 col1, col2, col3 = st.columns([1, 1, 1])
                 with col1:
+                    fmt = st.selectbox("Format", list(WRITERS), format_func=str.capitalize,
+                                       help="Edits above are kept in the text download only")
                     st.download_button(
                         label="📥 Download Script",
-                        data=edited_script,
-                        file_name=f"news_script_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                        mime="text/plain"
+                        data=edited_script if fmt == 'text' else render_script(st.session_state.script_segments, fmt),
+                        file_name=f"news_script_{datetime.now().strftime('%Y%m%d_%H%M%S')}{WRITERS[fmt].extension}",
+                        mime=WRITERS[fmt].mime
                     )
                 
                 with col2:
@@ -530,4 +485,5 @@ def main():
                     st.metric("Read Time", f"{read_time:.1f} min")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    show_diagnostics()
\ No newline at end of file
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML-to-text cleaning used when fetching articles.
+
+Compares text_clean.html_to_text() with the BeautifulSoup get_text() call it
+replaced, on synthetic feed entries, and checks both give identical output.
+
+    python bench_clean.py [--entries 2000] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from news_to_text.text_clean import clean_entry_text, html_to_text
+
+WORDS = ('government minister said on tuesday that the new policy would '
+         'affect thousands of families across the country according to '
+         'officials familiar with the plans markets rose sharply').split()
+
+
+def make_entry(rng):
+    """Build (content, summary) HTML resembling a typical feed entry"""
+    paragraphs = []
+    for _ in range(rng.randint(2, 12)):
+        sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+        paragraphs.append(
+            f'<p class="body">{sentence.capitalize()} &amp; '
+            f'<a href="https://example.com/{rng.randint(1, 9999)}">more</a>'
+            f'<em>&#8220;{rng.choice(WORDS)}&#8221;</em>.</p>'
+        )
+    paragraphs.append('<figure><img src="x.jpg"><figcaption>Photo</figcaption></figure>')
+    content = '<div>' + '\n'.join(paragraphs) + '<script>track();</script></div>'
+    # Roughly a third of feeds repeat the description as the content
+    summary = content if rng.random() < 0.3 else paragraphs[0]
+    return content, summary
+
+
+def soup_text(markup):
+    return BeautifulSoup(markup, 'html.parser').get_text(separator=' ', strip=True)
+
+
+def bench(label, func, entries, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for content, summary in entries:
+            func(content, summary)
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<28} {best * 1000:9.1f} ms  ({len(entries) / best:,.0f} entries/s)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = [make_entry(rng) for _ in range(args.entries)]
+    # Plain-text entries exercise the no-markup fast path
+    for _ in range(args.entries // 4):
+        plain = ' '.join(rng.choice(WORDS) for _ in range(40))
+        entries.append((plain, plain))
+
+    mismatches = sum(
+        1 for content, summary in entries
+        if html_to_text(content) != soup_text(content) or html_to_text(summary) != soup_text(summary)
+    )
+    print(f"📊 {len(entries)} entries, {mismatches} output mismatches")
+
+    baseline = bench('BeautifulSoup get_text', lambda c, s: (soup_text(c), soup_text(s)),
+                     entries, args.repeat)
+    fast = bench('text_clean.clean_entry_text', clean_entry_text, entries, args.repeat)
+    print(f"\n⚡ Speedup: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
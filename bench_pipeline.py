@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the fetch → clean → summarize → script pipeline.
+
+Starts a local HTTP server that stands in for news sites, serving synthetic
+RSS and Atom feeds (plus slow hosts, failing hosts and 304 responses), then
+times each stage of the pipeline against it. Nothing leaves the machine.
+
+    python bench_pipeline.py [--feeds 12] [--entries 40] [--out results.json]
+    python bench_pipeline.py --baseline results.json   # fail on regressions
+
+Each stage reports its per-call latency percentiles and throughput. With
+--baseline, stages whose median latency grew by more than --tolerance are
+flagged and the script exits with status 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ('government minister said on tuesday that the new policy would '
+         'affect thousands of families across the country according to '
+         'officials familiar with the plans markets rose sharply').split()
+
+
+# Synthetic content
+
+def make_body(rng, paragraphs):
+    """HTML article body with links, entities, inline markup and a script tag"""
+    parts = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(2, 5)):
+            sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 24)))
+            sentences.append(sentence.capitalize() + '.')
+        parts.append(
+            f'<p class="body">{" ".join(sentences)} &amp; '
+            f'<a href="https://example.com/{rng.randint(1, 9999)}">more</a> '
+            f'<em>&#8220;{rng.choice(WORDS)}&#8221;</em></p>'
+        )
+    parts.append('<figure><img src="x.jpg"><figcaption>Photo</figcaption></figure>')
+    return '<div>' + '\n'.join(parts) + '<script>track();</script></div>'
+
+
+def _escape(markup):
+    return markup.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def make_feed(rng, index, entries, paragraphs, atom=False):
+    """Build feed bytes with `entries` items, as RSS 2.0 or Atom"""
+    items = []
+    for i in range(entries):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 10))).capitalize()
+        link = f'https://news{index}.example.com/story/{i}'
+        body = _escape(make_body(rng, rng.randint(1, paragraphs)))
+        summary = _escape(make_body(rng, 1))
+        timestamp = time.time() - i * 600
+        published = formatdate(timestamp, usegmt=True)
+        if atom:
+            items.append(f'<entry><title>{title}</title><link href="{link}"/><id>{link}</id>'
+                         f'<updated>{datetime.fromtimestamp(timestamp, timezone.utc).isoformat()}</updated>'
+                         f'<summary type="html">{summary}</summary>'
+                         f'<content type="html">{body}</content></entry>')
+        else:
+            items.append(f'<item><title>{title}</title><link>{link}</link>'
+                         f'<pubDate>{published}</pubDate><description>{summary}</description>'
+                         f'<content:encoded>{body}</content:encoded></item>')
+    if atom:
+        return ('<?xml version="1.0" encoding="utf-8"?>'
+                '<feed xmlns="http://www.w3.org/2005/Atom">'
+                f'<title>Bench feed {index}</title>' + ''.join(items) + '</feed>').encode()
+    return ('<?xml version="1.0" encoding="utf-8"?>'
+            '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">'
+            f'<channel><title>Bench feed {index}</title><ttl>15</ttl>'
+            + ''.join(items) + '</channel></rss>').encode()
+
+
+# Local feed server
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Feed sniffing hangs up after the first few KB; that's expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FeedServer:
+    """Serves synthetic feeds on 127.0.0.1 from a background thread.
+
+    /feed/N       feed N, with an ETag so repeat requests can get a 304
+    /slow/N       feed N after `slow_delay` seconds
+    /error/N      HTTP 500
+    /site/N/      a home page whose <link rel="alternate"> points at /feed/N
+    /bare/N/      a home page with no feed link (discovery probes /rss.xml)
+    /rss.xml      feed 0, for discovery by common path
+    """
+
+    def __init__(self, feeds, slow_delay=0.5):
+        self.feeds = feeds
+        self.slow_delay = slow_delay
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.handle(self)
+
+            do_HEAD = do_GET
+
+        self.httpd = _Server(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _send(self, request, status, body=b'', content_type='text/html', headers=()):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            request.send_header(name, value)
+        request.end_headers()
+        if request.command != 'HEAD':
+            request.wfile.write(body)
+
+    def _send_feed(self, request, index):
+        etag = f'"feed-{index}"'
+        if request.headers.get('If-None-Match') == etag:
+            self._send(request, 304, headers=[('ETag', etag)])
+            return
+        self._send(request, 200, self.feeds[index], 'application/rss+xml', [('ETag', etag)])
+
+    def handle(self, request):
+        parts = request.path.strip('/').split('/')
+        try:
+            kind = parts[0]
+            index = int(parts[1]) % len(self.feeds) if len(parts) > 1 else 0
+        except ValueError:
+            self._send(request, 404)
+            return
+
+        if kind == 'feed':
+            self._send_feed(request, index)
+        elif kind == 'slow':
+            time.sleep(self.slow_delay)
+            self._send_feed(request, index)
+        elif kind == 'error':
+            self._send(request, 500, b'Internal Server Error')
+        elif kind == 'site':
+            page = (f'<html><head><title>Site {index}</title>'
+                    f'<link rel="alternate" type="application/rss+xml" href="/feed/{index}">'
+                    '</head><body><h1>News</h1></body></html>')
+            self._send(request, 200, page.encode())
+        elif kind == 'bare':
+            self._send(request, 200, b'<html><body><h1>News</h1></body></html>')
+        elif kind == 'rss.xml':
+            self._send_feed(request, 0)
+        else:
+            self._send(request, 404)
+
+
+# Measurement
+
+class Stage:
+    """Latency samples for one pipeline stage"""
+
+    def __init__(self, name, unit):
+        self.name = name
+        self.unit = unit
+        self.samples = []
+        self.items = 0
+
+    def time(self, func, *args, items=1, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.samples.append(time.perf_counter() - start)
+        self.items += items
+        return result
+
+    def summary(self):
+        samples = sorted(self.samples)
+        total = sum(samples)
+
+        def percentile(p):
+            # Nearest-rank percentile
+            return samples[min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))] * 1000
+
+        return {
+            'unit': self.unit,
+            'calls': len(samples),
+            'items': self.items,
+            'total_s': round(total, 6),
+            'throughput': round(self.items / total, 2) if total else None,
+            'p50_ms': round(percentile(50), 3),
+            'p90_ms': round(percentile(90), 3),
+            'p99_ms': round(percentile(99), 3),
+            'max_ms': round(samples[-1] * 1000, 3),
+        }
+
+
+def run_benchmark(args):
+    import feedparser
+
+    from news_to_text import storage, summary_cache
+    from news_to_text.feed_stream import CHUNK_SIZE, read_entries
+    from news_to_text.feeds import (fetch_all_feeds, fetch_articles, fetch_feed,
+                                    find_rss_feed, parse_feed, refresh_feeds)
+    from news_to_text.http_client import http_get
+    from news_to_text.script import generate_news_script, generate_summary
+    from news_to_text.text_clean import clean_entry_text
+
+    rng = random.Random(args.seed)
+    feeds = [make_feed(rng, i, args.entries, args.paragraphs, atom=i % 3 == 2)
+             for i in range(args.feeds)]
+    stages = {}
+
+    def stage(name, unit):
+        return stages.setdefault(name, Stage(name, unit))
+
+    with FeedServer(feeds, args.slow_delay) as server:
+        base = server.base_url
+        feed_urls = [f'{base}/feed/{i}' for i in range(args.feeds)]
+
+        for _ in range(args.repeat):
+            # Discovery from a home page link, and by probing common paths
+            for i in range(min(args.feeds, 4)):
+                stage('find_rss_feed', 'sites').time(find_rss_feed, f'{base}/site/{i}/')
+            stage('find_rss_feed_probe', 'sites').time(find_rss_feed, f'{base}/bare/0/')
+
+            # fetch_articles split into its parts
+            for index, url in enumerate(feed_urls):
+                data = stage('fetch.network', 'feeds').time(lambda: http_get(url, timeout=15).content)
+                parsed = stage('fetch.feedparser', 'feeds').time(feedparser.parse, data)
+                stage('fetch.stream', 'feeds').time(
+                    lambda: read_entries([data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)],
+                                         args.entries))
+                entries = [(entry.content[0].value if 'content' in entry else entry.get('description', ''),
+                            entry.get('summary', '')) for entry in parsed.entries[:args.entries]]
+                stage('fetch.clean', 'entries').time(
+                    lambda: [clean_entry_text(content, summary) for content, summary in entries],
+                    items=len(entries))
+                stage('parse_feed', 'entries').time(parse_feed, data, args.entries, items=len(entries))
+                stage('fetch_articles', 'feeds').time(fetch_articles, url, args.entries)
+                stage('fetch_feed.304', 'feeds').time(fetch_feed, url, args.entries, etag=f'"feed-{index}"')
+
+            # A batch mixing healthy, slow and failing hosts
+            batch = [(f'feed{i}', url) for i, url in enumerate(feed_urls)]
+            batch += [(f'slow{i}', f'{base}/slow/{i}') for i in range(args.slow)]
+            batch += [(f'error{i}', f'{base}/error/{i}') for i in range(args.errors)]
+            stage('fetch_all_feeds', 'feeds').time(
+                lambda: list(fetch_all_feeds(batch, args.entries, feed_timeout=10,
+                                             total_timeout=args.slow_delay + 30)),
+                items=len(batch))
+            if args.processes is not None:
+                stage('fetch_all_feeds.procs', 'feeds').time(
+                    lambda: list(fetch_all_feeds(batch, args.entries, feed_timeout=10,
+                                                 total_timeout=args.slow_delay + 30,
+                                                 processes=args.processes)),
+                    items=len(batch))
+
+            # Everything from here writes to the store, so use a scratch database
+            with tempfile.TemporaryDirectory() as tmp:
+                db_path = storage.DB_PATH
+                storage.close_all()
+                storage.DB_PATH = os.path.join(tmp, 'bench.db')
+                try:
+                    storage.init_db()
+                    # Store round trip: first fetch writes everything, the second gets 304s
+                    sources = [(f'feed{i}', url) for i, url in enumerate(feed_urls)]
+                    for source, url in sources:
+                        storage.save_discovered_feed(source, url, source)
+                    stage('refresh_feeds.cold', 'feeds').time(
+                        lambda: list(refresh_feeds(sources, args.entries)), items=len(sources))
+                    stage('refresh_feeds.warm', 'feeds').time(
+                        lambda: list(refresh_feeds(sources, args.entries)), items=len(sources))
+                    articles = storage.load_stored_articles([source for source, _ in sources])
+
+                    for article in articles:
+                        stage('generate_summary', 'articles').time(
+                            generate_summary, article['content'] or article['summary'])
+
+                    # Summaries from earlier rounds would turn this into cache lookups
+                    summary_cache.clear_memory()
+                    selection = rng.sample(articles, min(args.stories, len(articles)))
+                    stage('generate_news_script', 'stories').time(
+                        generate_news_script, selection, items=len(selection))
+                finally:
+                    storage.close_all()
+                    storage.DB_PATH = db_path
+
+    return {name: stage.summary() for name, stage in stages.items()}
+
+
+def compare(results, baseline, tolerance):
+    """Print median latency against the baseline, returning the regressed stages"""
+    regressions = []
+    print(f"\n{'stage':<24} {'baseline p50':>13} {'p50':>10} {'change':>8}")
+    for name, stats in results.items():
+        before = baseline.get('stages', {}).get(name)
+        if not before or not before['p50_ms']:
+            print(f"  {name:<22} {'-':>13} {stats['p50_ms']:>9.2f}ms {'new':>8}")
+            continue
+        ratio = stats['p50_ms'] / before['p50_ms']
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = '  ⚠️ regression'
+        print(f"  {name:<22} {before['p50_ms']:>11.2f}ms {stats['p50_ms']:>9.2f}ms "
+              f"{(ratio - 1) * 100:>+7.0f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--feeds', type=int, default=12, help="Healthy feeds served")
+    parser.add_argument('--entries', type=int, default=40, help="Entries per feed")
+    parser.add_argument('--paragraphs', type=int, default=12,
+                        help="Most HTML paragraphs per entry body")
+    parser.add_argument('--slow', type=int, default=2, help="Slow hosts in the batch fetch")
+    parser.add_argument('--slow-delay', type=float, default=0.5, help="Seconds a slow host stalls")
+    parser.add_argument('--errors', type=int, default=2, help="Failing hosts in the batch fetch")
+    parser.add_argument('--stories', type=int, default=10, help="Stories per generated script")
+    parser.add_argument('--processes', type=int, metavar='N',
+                        help="Also time the batch fetch cleaning in N worker processes (0 = one per core)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="Write results as JSON here")
+    parser.add_argument('--baseline', help="Compare against results saved with --out")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed median slowdown before flagging a regression (default: 0.25)")
+    args = parser.parse_args()
+
+    print(f"📊 {args.feeds} feeds x {args.entries} entries, {args.slow} slow and "
+          f"{args.errors} failing hosts, {args.repeat} rounds")
+    results = run_benchmark(args)
+
+    print(f"\n{'stage':<24} {'calls':>6} {'p50':>9} {'p90':>9} {'p99':>9}   throughput")
+    for name, stats in results.items():
+        throughput = f"{stats['throughput']:,.0f} {stats['unit']}/s" if stats['throughput'] else '-'
+        print(f"  {name:<22} {stats['calls']:>6} {stats['p50_ms']:>7.2f}ms {stats['p90_ms']:>7.2f}ms "
+              f"{stats['p99_ms']:>7.2f}ms   {throughput}")
+
+    if args.out:
+        report = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {key: value for key, value in vars(args).items()
+                       if key not in ('out', 'baseline', 'tolerance')},
+            'stages': results,
+        }
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved results to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) slower than the baseline: {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+News to Text core library.
+
+The fetch, clean, summarize and script functions behind the Streamlit app,
+usable on their own (e.g. from cron) without importing Streamlit::
+
+    from news_to_text import storage, refresh_feeds, generate_news_script
+
+Submodules, and the heavy third-party packages they depend on, are imported
+on first use so that `import news_to_text` and the CLI start quickly.
+"""
+
+import importlib
+
+__version__ = '0.1.0'
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'KNOWN_RSS_FEEDS': 'feeds',
+    'find_rss_feed': 'feeds',
+    'get_rss_url': 'feeds',
+    'fetch_feed': 'feeds',
+    'parse_feed': 'feeds',
+    'fetch_articles': 'feeds',
+    'fetch_all_feeds': 'feeds',
+    'refresh_feeds': 'feeds',
+    'Article': 'articles',
+    'load_articles': 'articles',
+    'read_feed_list': 'feed_list',
+    'import_feeds': 'feed_list',
+    'export_opml': 'feed_list',
+    'export_csv': 'feed_list',
+    'html_to_text': 'text_clean',
+    'clean_entry_text': 'text_clean',
+    'extract_main_text': 'fulltext',
+    'fetch_article_bodies': 'fulltext',
+    'cluster_articles': 'dedup',
+    'summarize': 'summarizer',
+    'summarize_batch': 'summarizer',
+    'generate_summary': 'script',
+    'generate_news_script': 'script',
+    'iter_script_segments': 'script',
+    'write_script': 'script',
+    'merge_timeline': 'timeline',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f'.{module}', __name__), name)
@@ -0,0 +1,83 @@
+"""
+Compact article records for long-lived sessions.
+
+The fetch and script functions pass articles around as dicts carrying the
+full summary and content text, which is fine for a single bulletin but
+adds up when a Streamlit session holds hundreds of them across reruns.
+An Article keeps only what the selection list and timeline show: the ID
+(the article's url_hash), title, URL, published date and timestamp, a
+teaser cut from the summary and the source, interned so every record of
+one feed shares it. The full summary and content stay in the article
+store and are read back only by load_articles(), for a whole selection
+in one query.
+
+Records read like the dicts (`article['title']`, `article.get('source')`),
+so display code takes either.
+"""
+
+import sys
+
+from . import storage
+
+# Characters of the summary kept as a teaser
+TEASER_LENGTH = 300
+
+
+class Article:
+    __slots__ = ('id', 'title', 'url', 'published', 'published_ts', 'teaser', 'source')
+
+    def __init__(self, id, title, url, published='', published_ts=None, teaser='', source=None):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.published = published
+        self.published_ts = published_ts
+        self.teaser = teaser
+        self.source = sys.intern(source) if source else source
+
+    @classmethod
+    def from_dict(cls, article):
+        """Compact record for an article dict, which must have been stored"""
+        return cls(article['url_hash'], article['title'], article['url'],
+                   article.get('published') or '', article.get('published_ts'),
+                   (article.get('summary') or '')[:TEASER_LENGTH],
+                   article.get('source'))
+
+    def to_dict(self, summary=None, content=''):
+        return {
+            'title': self.title, 'url': self.url, 'published': self.published,
+            'published_ts': self.published_ts,
+            'summary': self.teaser if summary is None else summary, 'content': content,
+            'url_hash': self.id, 'source': self.source,
+        }
+
+    # Dict-style reads, with the field names the article dicts use
+    def __getitem__(self, key):
+        if key == 'url_hash':
+            return self.id
+        if key == 'summary':
+            return self.teaser
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        return isinstance(other, Article) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"Article({self.id!r}, {self.title!r})"
+
+
+def load_articles(records):
+    """Full article dicts for records, their text read from the store in one query"""
+    texts = storage.get_article_texts([record.id for record in records])
+    return [record.to_dict(*texts.get(record.id, (None, ''))) for record in records]
@@ -0,0 +1,392 @@
+"""
+Command line interface.
+
+    news-to-text sources
+    news-to-text fetch [--sources bbc.com cnn.com]
+    news-to-text bulletin --sources bbc.com,npr.org --out script.txt
+    news-to-text poll
+    news-to-text search "election results" --days 7
+    news-to-text timeline --hours 2
+    news-to-text export --out sources.opml
+    news-to-text import sources.opml
+
+Sources default to the ones marked active in the app. Only argparse is
+imported up front; each command imports what it needs.
+"""
+
+import argparse
+import logging
+import sys
+
+
+def _resolve_sources(args):
+    """Sources named on the command line, or the active ones"""
+    from . import storage
+    from .feeds import clean_domain
+
+    if args.sources:
+        # Accept both "--sources a b" and "--sources a,b"
+        return [clean_domain(domain) for value in args.sources
+                for domain in value.split(',') if domain.strip()]
+    return storage.get_active_sources()
+
+
+def _fetch(args, sources, full_text=False):
+    """Refresh sources into the article store, returning {source: articles}"""
+    from . import storage
+    from .feeds import refresh_feeds
+
+    feeds = storage.get_feed_urls(sources)
+    for source in sorted(set(sources) - {source for source, _ in feeds}):
+        print(f"✗ {source}: no RSS feed known (add it in the app first)", file=sys.stderr)
+
+    by_source = {}
+    for source, articles, error in refresh_feeds(feeds, limit=args.limit,
+                                                 total_timeout=args.timeout,
+                                                 full_text=full_text,
+                                                 processes=args.processes):
+        if error:
+            print(f"✗ {source}: {error}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"✓ {source}: {len(articles)} articles", file=sys.stderr)
+        # Feeds skipped by the circuit breaker still have their stored articles
+        if articles or not error:
+            by_source[source] = articles
+    return by_source
+
+
+def cmd_sources(args):
+    from . import storage
+
+    for domain, rss_url, display_name, last_success, is_active in storage.get_cached_feeds():
+        print(f"{'*' if is_active else ' '} {domain:<24} {display_name or domain:<24} {rss_url}")
+    return 0
+
+
+def cmd_fetch(args):
+    sources = _resolve_sources(args)
+    if not sources:
+        print("No sources given and none are active.", file=sys.stderr)
+        return 1
+    by_source = _fetch(args, sources, full_text=args.full_text)
+    return 0 if by_source else 1
+
+
+def cmd_bulletin(args):
+    from . import storage
+    from .script import iter_script_segments, write_script
+
+    sources = _resolve_sources(args)
+    if not sources:
+        print("No sources given and none are active.", file=sys.stderr)
+        return 1
+
+    if args.no_fetch:
+        by_source = {}
+        for article in storage.load_stored_articles(sources):
+            by_source.setdefault(article['source'], []).append(article)
+    else:
+        by_source = _fetch(args, sources)
+
+    articles = [article for source in sources
+                for article in by_source.get(source, [])[:args.per_source]]
+    if args.max_stories:
+        articles = articles[:args.max_stories]
+    if not articles:
+        print("No articles found for the selected sources.", file=sys.stderr)
+        return 1
+
+    if args.full_text:
+        from .fulltext import fetch_article_bodies
+
+        for article, error in fetch_article_bodies(articles):
+            if error and not args.quiet:
+                print(f"✗ {article['url']}: {error}", file=sys.stderr)
+
+    # Each segment is written out as soon as it is ready; the intro says
+    # how many stories are left once duplicates are merged
+    stories = []
+
+    def segments():
+        for segment in iter_script_segments(articles, summary_mode=args.summary_mode,
+                                            dedupe=not args.keep_duplicates):
+            if segment['type'] == 'intro':
+                stories.append(segment['stories'])
+            yield segment
+
+    if args.out and args.out != '-':
+        with open(args.out, 'w', encoding='utf-8') as f:
+            write_script(segments(), f, args.format)
+        if not args.quiet:
+            print(f"📄 Wrote {stories[0]} stories to {args.out}", file=sys.stderr)
+    else:
+        write_script(segments(), sys.stdout, args.format)
+        if args.format == 'text':
+            sys.stdout.write('\n')
+    return 0
+
+
+def cmd_search(args):
+    from datetime import datetime, timedelta
+
+    from . import storage
+
+    sources = _resolve_sources(args) if args.sources else None
+    since = datetime.now() - timedelta(days=args.days) if args.days else None
+    matches = storage.search_articles(' '.join(args.query), sources, since=since, limit=args.limit)
+    for article in matches:
+        print(f"{article['source']:<20} {article['title']}\n{'':<20} {article['url']}")
+    if not matches and not args.quiet:
+        print("No matching articles.", file=sys.stderr)
+    return 0 if matches else 1
+
+
+def cmd_timeline(args):
+    from datetime import datetime
+
+    from . import storage
+    from .timeline import window_start
+
+    sources = _resolve_sources(args) if args.sources else None
+    articles = storage.get_timeline(window_start(args.hours), domains=sources, limit=args.limit)
+    for article in articles:
+        published = datetime.fromtimestamp(article['published_ts'])
+        print(f"{published:%a %H:%M}  {article['source']:<20} {article['title']}")
+    if not articles and not args.quiet:
+        print(f"Nothing published in the last {args.hours:g} hours.", file=sys.stderr)
+    return 0 if articles else 1
+
+
+def cmd_export(args):
+    from . import storage
+    from .feed_list import export_csv, export_opml, guess_format
+
+    fmt = args.format or (guess_format(args.out) if args.out and args.out != '-' else 'opml')
+    feeds = storage.get_cached_feeds()
+    document = export_csv(feeds) if fmt == 'csv' else export_opml(feeds)
+    if args.out and args.out != '-':
+        with open(args.out, 'w', encoding='utf-8', newline='') as f:
+            f.write(document)
+        if not args.quiet:
+            print(f"📄 Wrote {len(feeds)} sources to {args.out}", file=sys.stderr)
+    else:
+        sys.stdout.write(document)
+    return 0
+
+
+def cmd_import(args):
+    from .feed_list import guess_format, import_feeds, read_feed_list
+
+    with open(args.file, 'rb') as f:
+        data = f.read()
+    try:
+        entries = read_feed_list(data, args.format or guess_format(args.file))
+    except ValueError as e:
+        print(f"{args.file}: {e}", file=sys.stderr)
+        return 1
+    if not entries:
+        print(f"No sources found in {args.file}", file=sys.stderr)
+        return 1
+
+    failed = 0
+    for entry, error in import_feeds(entries, activate=True if args.activate else None,
+                                     max_workers=args.workers, total_timeout=args.timeout):
+        if error:
+            failed += 1
+            print(f"✗ {entry['domain']:<28} {error}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"✓ {entry['domain']:<28} {entry['rss_url']}", file=sys.stderr)
+    if not args.quiet:
+        print(f"Imported {len(entries) - failed} of {len(entries)} sources, {failed} failed",
+              file=sys.stderr)
+    return 0 if failed < len(entries) else 1
+
+
+def cmd_poll(args):
+    import signal
+    import threading
+
+    from . import poller
+
+    if args.once:
+        outcomes = poller.poll_due(args.workers, args.limit, full_text=args.full_text,
+                                   processes=args.processes)
+        if not args.quiet:
+            failed = sum(1 for error in outcomes.values() if error)
+            print(f"Polled {len(outcomes)} feeds, {failed} failed", file=sys.stderr)
+        return 0
+
+    # Finish the current batch and exit cleanly on Ctrl+C or SIGTERM
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        poller.run(args.workers, args.limit, stop=stop, full_text=args.full_text,
+                   processes=args.processes)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def build_parser():
+    from .script import WRITERS
+    from .summarizer import SUMMARY_MODES
+
+    # Options every command accepts
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--db', help="SQLite database path (default: rss_feeds.db)")
+    common.add_argument('-q', '--quiet', action='store_true', help="Only print errors")
+    common.add_argument('-v', '--verbose', action='store_true', help="Log debug output")
+    common.add_argument('--metrics', metavar='PATH',
+                        help="Write stage timings here when done: JSON for *.json, "
+                             "Prometheus text otherwise, '-' for stderr")
+    common.add_argument('--profile', metavar='PATH',
+                        help="Run under cProfile and save the stats here")
+
+    parser = argparse.ArgumentParser(
+        prog='news-to-text',
+        description="Fetch news feeds and write broadcast-ready bulletin scripts.",
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sources = commands.add_parser('sources', parents=[common],
+                                  help="List known sources (* = active)")
+    sources.set_defaults(func=cmd_sources)
+
+    def add_processes_option(command):
+        command.add_argument('--processes', type=int, metavar='N',
+                             help="Parse, clean and summarize in N worker processes "
+                                  "(0 = one per core; default: in-process)")
+
+    def add_fetch_options(command):
+        command.add_argument('--sources', nargs='+', metavar='DOMAIN',
+                             help="Sources to use (default: active sources)")
+        command.add_argument('--limit', type=int, default=20,
+                             help="Articles to read per feed (default: 20)")
+        command.add_argument('--timeout', type=float, default=45,
+                             help="Overall fetch deadline in seconds (default: 45)")
+        add_processes_option(command)
+
+    fetch = commands.add_parser('fetch', parents=[common],
+                                help="Fetch sources into the article store")
+    add_fetch_options(fetch)
+    fetch.add_argument('--full-text', action='store_true',
+                       help="Also download new articles' pages for their full text")
+    fetch.set_defaults(func=cmd_fetch)
+
+    bulletin = commands.add_parser('bulletin', parents=[common],
+                                   help="Fetch sources and write a bulletin script")
+    add_fetch_options(bulletin)
+    bulletin.add_argument('--out', '-o', help="Write the script here instead of stdout")
+    bulletin.add_argument('--format', '-f', choices=WRITERS, default='text',
+                          help="Output format (default: text)")
+    bulletin.add_argument('--per-source', type=int, default=2,
+                          help="Stories to take from each source (default: 2)")
+    bulletin.add_argument('--max-stories', type=int,
+                          help="Cap on the total number of stories")
+    bulletin.add_argument('--summary-mode', choices=SUMMARY_MODES, default='compat',
+                          help="Sentence scoring used for story summaries")
+    bulletin.add_argument('--keep-duplicates', action='store_true',
+                          help="Read stories carried by several sources once per source")
+    bulletin.add_argument('--no-fetch', action='store_true',
+                          help="Use stored articles without fetching")
+    bulletin.add_argument('--full-text', action='store_true',
+                          help="Download the chosen articles' pages and summarize their full text")
+    bulletin.set_defaults(func=cmd_bulletin)
+
+    search = commands.add_parser('search', parents=[common],
+                                 help="Search stored articles, best matches first")
+    search.add_argument('query', nargs='+', help="Words to search for")
+    search.add_argument('--sources', nargs='+', metavar='DOMAIN',
+                        help="Sources to search (default: all)")
+    search.add_argument('--days', type=float,
+                        help="Only articles fetched in the last N days")
+    search.add_argument('--limit', type=int, default=20,
+                        help="Most results to show (default: 20)")
+    search.set_defaults(func=cmd_search)
+
+    timeline = commands.add_parser('timeline', parents=[common],
+                                   help="Stored articles from every source, newest first")
+    timeline.add_argument('--hours', type=float, default=2,
+                          help="How far back to go (default: 2)")
+    timeline.add_argument('--sources', nargs='+', metavar='DOMAIN',
+                          help="Sources to include (default: all)")
+    timeline.add_argument('--limit', type=int, default=50,
+                          help="Most articles to show (default: 50)")
+    timeline.set_defaults(func=cmd_timeline)
+
+    export = commands.add_parser('export', parents=[common],
+                                 help="Write the source list as OPML or CSV")
+    export.add_argument('--out', '-o', help="Write here instead of stdout")
+    export.add_argument('--format', '-f', choices=['opml', 'csv'],
+                        help="Output format (default: from the file name, else opml)")
+    export.set_defaults(func=cmd_export)
+
+    imports = commands.add_parser('import', parents=[common],
+                                  help="Add sources from an OPML or CSV file")
+    imports.add_argument('file', help="OPML or CSV file to read")
+    imports.add_argument('--format', '-f', choices=['opml', 'csv'],
+                         help="Input format (default: from the file name)")
+    imports.add_argument('--activate', action='store_true',
+                         help="Mark every imported source active")
+    imports.add_argument('--workers', type=int, default=16,
+                         help="Sources checked at once (default: 16)")
+    imports.add_argument('--timeout', type=float, default=300,
+                         help="Overall deadline in seconds (default: 300)")
+    imports.set_defaults(func=cmd_import)
+
+    poll = commands.add_parser('poll', parents=[common],
+                               help="Keep active sources fresh in the background")
+    poll.add_argument('--workers', type=int, default=8,
+                      help="Most feeds fetched at once (default: 8)")
+    poll.add_argument('--limit', type=int, default=20,
+                      help="Articles to read per feed (default: 20)")
+    poll.add_argument('--once', action='store_true',
+                      help="Poll the feeds that are due, then exit")
+    poll.add_argument('--full-text', action='store_true',
+                      help="Also download new articles' pages for their full text")
+    add_processes_option(poll)
+    poll.set_defaults(func=cmd_poll)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    default_level = logging.INFO if args.command == 'poll' and not args.quiet else logging.WARNING
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else default_level,
+        format='%(levelname)s %(name)s: %(message)s',
+    )
+    if args.db:
+        from . import storage
+        storage.DB_PATH = args.db
+    if not (args.metrics or args.profile):
+        return args.func(args)
+
+    from . import metrics
+
+    if args.metrics:
+        metrics.enable()
+    try:
+        if args.profile:
+            with metrics.profile(args.profile, stream=None if args.quiet else sys.stderr):
+                return args.func(args)
+        return args.func(args)
+    finally:
+        if args.metrics:
+            _write_metrics(args.metrics)
+
+
+def _write_metrics(path):
+    from . import metrics
+
+    text = metrics.to_json() + '\n' if path.endswith('.json') else metrics.to_prometheus()
+    if path == '-':
+        sys.stderr.write(text)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
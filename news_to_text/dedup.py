@@ -0,0 +1,131 @@
+"""
+Near-duplicate story clustering.
+
+When several outlets carry the same story it shows up once per source. Each
+article's cleaned title and opening text is reduced to a MinHash signature
+over word bigrams, and locality-sensitive hashing (LSH) over bands of the
+signature finds candidate duplicates by bucket collisions instead of
+comparing every pair, so the cost grows roughly linearly with the number of
+articles. Candidates whose estimated Jaccard similarity reaches the
+threshold are merged into one story.
+"""
+
+import re
+import zlib
+
+# Signature length, split into BANDS bands of NUM_PERM // BANDS rows. Pairs
+# around (1 / BANDS) ** (BANDS / NUM_PERM) similarity start to collide.
+NUM_PERM = 128
+BANDS = 32
+
+# Estimated Jaccard similarity at which two articles are the same story
+SIMILARITY_THRESHOLD = 0.4
+
+# Words of each article considered; the lede is what outlets share
+MAX_WORDS = 400
+
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r'\w+')
+_hash_params = None
+
+
+def _shingles(article, word_hashes):
+    """Hashes of the article's word bigrams, as a uint64 array"""
+    import numpy as np
+
+    text = f"{article.get('title', '')} {article.get('content') or article.get('summary', '')}"
+    words = _WORD.findall(text.lower())[:MAX_WORDS]
+    for word in set(words).difference(word_hashes):
+        word_hashes[word] = zlib.crc32(word.encode())
+    hashes = np.fromiter(map(word_hashes.__getitem__, words), dtype=np.uint64, count=len(words))
+    if len(hashes) > 1:
+        # Combined below 2**53, so no overflow before the modulo
+        hashes = (hashes[:-1] * 1000003 + hashes[1:]) % _PRIME
+    return np.unique(hashes)
+
+
+def _params():
+    global _hash_params
+    if _hash_params is None:
+        import numpy as np
+
+        # Fixed seed so signatures are comparable between runs
+        rng = np.random.default_rng(0)
+        _hash_params = (rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64),
+                        rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64))
+    return _hash_params
+
+
+def minhash_signatures(articles):
+    """Return an (articles x NUM_PERM) array of MinHash signatures.
+
+    Articles with no words get an all-max signature and should be left out
+    of comparisons.
+    """
+    import numpy as np
+
+    a, b = _params()
+    signatures = np.full((len(articles), NUM_PERM), _PRIME, dtype=np.uint64)
+    word_hashes = {}
+    for i, article in enumerate(articles):
+        x = _shingles(article, word_hashes)
+        if len(x):
+            # Values stay below 2**62, so uint64 never overflows
+            signatures[i] = ((np.outer(x % _PRIME, a) + b) % _PRIME).min(axis=0)
+    return signatures
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_articles(articles, threshold=SIMILARITY_THRESHOLD):
+    """Group articles that tell the same story.
+
+    Returns a list of clusters, each a list of articles with its
+    representative first. The representative is the member with the most
+    text (the earliest one on a tie); clusters are ordered by where their
+    first member appears in `articles`.
+    """
+    if len(articles) < 2:
+        return [[article] for article in articles]
+
+    import numpy as np
+
+    signatures = minhash_signatures(articles)
+    has_words = (signatures != _PRIME).any(axis=1)
+    rows = NUM_PERM // BANDS
+    parent = list(range(len(articles)))
+
+    for band in range(BANDS):
+        keys = signatures[:, band * rows:(band + 1) * rows]
+        buckets = {}
+        for i in np.flatnonzero(has_words):
+            buckets.setdefault(keys[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root, other_root = _find(parent, first), _find(parent, other)
+                if root == other_root:
+                    continue
+                # Bucket collisions are only candidates; check the full signature
+                if np.mean(signatures[first] == signatures[other]) >= threshold:
+                    parent[other_root] = root
+
+    clusters = {}
+    for i in range(len(articles)):
+        clusters.setdefault(_find(parent, i), []).append(i)
+
+    def text_length(i):
+        article = articles[i]
+        return len(article.get('content') or article.get('summary', ''))
+
+    result = []
+    for members in clusters.values():
+        representative = max(members, key=lambda i: (text_length(i), -i))
+        result.append([articles[representative]] +
+                      [articles[i] for i in members if i != representative])
+    return result
@@ -0,0 +1,162 @@
+"""
+Import and export the source list as OPML or CSV.
+
+    news-to-text export --out sources.opml
+    news-to-text import sources.opml
+
+Exports write every known feed. OPML is what feed readers exchange; the
+CSV has columns domain, display_name, rss_url and is_active.
+
+Imports read either format: OPML <outline> elements with an xmlUrl (or
+just an htmlUrl), and CSV rows with at least a domain or rss_url column.
+Entries are checked concurrently in a bounded thread pool. A given feed
+URL must serve an RSS/Atom feed; an entry without one has its feed
+discovered from the site like the app's "Add New Source" form does. Every
+entry that checks out is written in one transaction at the end.
+"""
+
+import csv
+import io
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+from . import storage
+from .feeds import clean_domain, default_display_name, find_rss_feed, sniff_feed
+from .threads import run_in_threads
+
+# Entries checked at once
+MAX_WORKERS = 16
+
+CSV_COLUMNS = ['domain', 'display_name', 'rss_url', 'is_active']
+
+
+def guess_format(filename):
+    return 'csv' if filename.lower().endswith('.csv') else 'opml'
+
+
+def export_opml(feeds):
+    """OPML document for (domain, rss_url, display_name, ...) rows"""
+    root = ET.Element('opml', version='2.0')
+    head = ET.SubElement(root, 'head')
+    ET.SubElement(head, 'title').text = 'News to Text sources'
+    ET.SubElement(head, 'dateCreated').text = datetime.now().astimezone().strftime(
+        '%a, %d %b %Y %H:%M:%S %z')
+    body = ET.SubElement(root, 'body')
+    for domain, rss_url, display_name, *_ in feeds:
+        name = display_name or domain
+        ET.SubElement(body, 'outline', type='rss', text=name, title=name,
+                      xmlUrl=rss_url, htmlUrl=f'https://{domain}/')
+    ET.indent(root)
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding='unicode') + '\n'
+
+
+def export_csv(feeds):
+    """CSV for (domain, rss_url, display_name, last_success, is_active) rows"""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for domain, rss_url, display_name, _, is_active in feeds:
+        writer.writerow([domain, display_name or '', rss_url, int(bool(is_active))])
+    return out.getvalue()
+
+
+def _entry(site, rss_url, display_name, is_active=None):
+    domain = clean_domain(site)
+    return {'domain': domain, 'site': site, 'rss_url': rss_url or None,
+            'display_name': display_name or default_display_name(domain), 'is_active': is_active}
+
+
+def read_opml(data):
+    """Import entries from an OPML document; folders are flattened"""
+    entries = []
+    for outline in ET.fromstring(data).iter('outline'):
+        rss_url = (outline.get('xmlUrl') or '').strip()
+        site = (outline.get('htmlUrl') or '').strip()
+        if not (rss_url or site):
+            continue
+        entries.append(_entry(site or rss_url, rss_url,
+                              (outline.get('title') or outline.get('text') or '').strip()))
+    return entries
+
+
+def read_csv(text):
+    """Import entries from CSV with a header row naming at least domain or rss_url"""
+    entries = []
+    for row in csv.DictReader(io.StringIO(text)):
+        row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        rss_url = row.get('rss_url') or row.get('url', '')
+        domain = row.get('domain') or rss_url
+        if not domain:
+            continue
+        active = row.get('is_active', '')
+        entries.append(_entry(domain, rss_url, row.get('display_name') or row.get('name'),
+                              active.lower() in ('1', 'true', 'yes') if active else None))
+    return entries
+
+
+def read_feed_list(data, fmt):
+    """Import entries from `data` (bytes or str) in `fmt` ('opml' or 'csv').
+
+    Raises ValueError for a file that can't be read in that format.
+    """
+    try:
+        if fmt == 'csv':
+            if isinstance(data, bytes):
+                data = data.decode('utf-8-sig', errors='replace')
+            return read_csv(data)
+        return read_opml(data)
+    except (ET.ParseError, csv.Error) as e:
+        raise ValueError(f"Not a valid {fmt.upper()} file: {e}") from e
+
+
+def check_entry(entry, timeout=10, deadline=None):
+    """Return the entry's working feed URL, raising ValueError if there is none"""
+    if entry['rss_url']:
+        if not sniff_feed(entry['rss_url'], timeout=timeout, deadline=deadline):
+            raise ValueError("Not an RSS/Atom feed")
+        return entry['rss_url']
+    budget = timeout * 2
+    if deadline is not None:
+        budget = min(budget, deadline - time.monotonic())
+    rss_url = find_rss_feed(entry['site'], budget=budget)
+    if not rss_url:
+        raise ValueError("No RSS feed found")
+    return rss_url
+
+
+def import_feeds(entries, activate=None, max_workers=MAX_WORKERS, timeout=10, total_timeout=300):
+    """Check and store imported entries, yielding (entry, error) as each one finishes.
+
+    Entries are dicts from read_feed_list(). A later entry for a domain
+    already in the list is reported as a duplicate. Each check is bounded
+    by `timeout` and the whole batch by `total_timeout`. Entries that pass
+    have their `rss_url` filled in and are stored in one transaction once
+    the batch is done, replacing what was known about their domain.
+    `activate` (True or False) overrides the entries' own is_active;
+    sources left unset keep their current state, or start inactive.
+    """
+    to_check = {}
+    for entry in entries:
+        if entry['domain'] in to_check:
+            yield entry, f"Duplicate of an earlier entry for {entry['domain']}"
+        else:
+            to_check[entry['domain']] = entry
+    if not to_check:
+        return
+
+    checked = []
+    deadline = time.monotonic() + total_timeout
+    try:
+        for entry, rss_url, error in run_in_threads(
+                lambda entry: check_entry(entry, timeout, deadline), to_check.values(),
+                max_workers, total_timeout):
+            if error:
+                yield entry, str(error)
+                continue
+            entry['rss_url'] = rss_url
+            checked.append((entry['domain'], entry['rss_url'], entry['display_name'],
+                            entry['is_active'] if activate is None else activate))
+            yield entry, None
+    finally:
+        storage.save_feeds(checked)
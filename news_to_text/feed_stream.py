@@ -0,0 +1,197 @@
+"""
+Streaming RSS/Atom entry reader.
+
+feedparser needs the whole document in memory and parses every entry in
+it, while a bulletin only ever uses the first few. read_entries() feeds
+the response body through an incremental XML parser chunk by chunk, turns
+each <item>/<entry> into a dict as soon as it is complete, drops it from
+the tree, and stops reading once `limit` entries are in hand. It never
+reads more than `max_bytes`.
+
+Only well-formed feeds can be read this way. For anything expat rejects
+(undeclared HTML entities, bad encodings, tag soup) read_entries() returns
+None and the caller falls back to feedparser.
+"""
+
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Most of a feed read before giving up on the rest of it
+MAX_FEED_BYTES = 8 * 1024 * 1024
+
+# Bytes handed to the parser at a time
+CHUNK_SIZE = 16 * 1024
+
+ATOM = 'http://www.w3.org/2005/Atom'
+RSS1 = 'http://purl.org/rss/1.0/'
+CONTENT = 'http://purl.org/rss/1.0/modules/content/'
+DC = 'http://purl.org/dc/elements/1.1/'
+DCTERMS = 'http://purl.org/dc/terms/'
+MEDIA = 'http://search.yahoo.com/mrss/'
+XHTML = 'http://www.w3.org/1999/xhtml'
+
+# Atom link types that point at the article's page
+HTML_TYPES = frozenset(['text/html', 'application/xhtml+xml'])
+
+ENTRY_TAGS = frozenset(['item', f'{{{RSS1}}}item', f'{{{ATOM}}}entry'])
+
+# Child elements of an entry -> the field they fill, as feedparser names them
+FIELDS = {f'{ns}{tag}': field
+          for ns in ('', f'{{{RSS1}}}', f'{{{ATOM}}}')
+          for tag, field in (('title', 'title'), ('link', 'link'), ('description', 'summary'))}
+FIELDS.update({
+    'guid': 'guid',
+    'pubDate': 'published',
+    f'{{{CONTENT}}}encoded': 'content',
+    f'{{{ATOM}}}summary': 'summary',
+    f'{{{ATOM}}}content': 'content',
+    f'{{{ATOM}}}id': 'id',
+    f'{{{MEDIA}}}description': 'summary',
+    f'{{{ATOM}}}published': 'published',
+    f'{{{ATOM}}}issued': 'published',
+    f'{{{DCTERMS}}}issued': 'published',
+    f'{{{ATOM}}}updated': 'updated',
+    f'{{{ATOM}}}modified': 'updated',
+    f'{{{DC}}}date': 'updated',
+    f'{{{DCTERMS}}}modified': 'updated',
+})
+
+
+def parse_timestamp(value):
+    """UTC epoch seconds for an RFC 822 or ISO 8601 date, or None.
+
+    Dates without a timezone are taken as UTC. feedparser does the same for
+    ISO 8601 but drops a zone-less RFC 822 date, so for those this reader
+    keeps a publish time where the feedparser fallback has none, on purpose.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            when = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    try:
+        return int(when.timestamp())
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _inner_xhtml(element):
+    """Markup inside an Atom type="xhtml" element, without its wrapping <div>"""
+    children = list(element)
+    if (len(children) == 1 and children[0].tag in ('div', f'{{{XHTML}}}div')
+            and not (element.text or '').strip()):
+        element = children[0]
+    for node in element.iter():
+        if isinstance(node.tag, str) and node.tag.startswith('{'):
+            node.tag = node.tag.split('}', 1)[1]
+    return (element.text or '') + ''.join(ET.tostring(child, encoding='unicode') for child in element)
+
+
+def _children(element):
+    """An entry's child elements, with those of a <media:group> in its place"""
+    for child in element:
+        if child.tag == f'{{{MEDIA}}}group':
+            yield from child
+        else:
+            yield child
+
+
+def _entry(element):
+    """Turn a complete <item>/<entry> element into an article's raw fields"""
+    found = {}
+    for child in _children(element):
+        field = FIELDS.get(child.tag)
+        if field is None:
+            continue
+        if field == 'summary' and 'summary' in found:
+            # As in feedparser, a second description (say <description>
+            # and <media:description>) is taken as the content
+            field = 'content'
+        if field == 'link':
+            # As in feedparser, the last of the item's <link> and its
+            # alternate HTML Atom links is the article (Atom links are
+            # attributes)
+            if child.tag != f'{{{ATOM}}}link':
+                found['link'] = ''.join(child.itertext()).strip()
+            elif (child.get('rel', 'alternate') == 'alternate'
+                  and child.get('type', 'text/html') in HTML_TYPES):
+                found['link'] = child.get('href', '').strip()
+            continue
+        if field == 'guid':
+            # A guid is the article's address unless marked otherwise
+            if child.get('isPermaLink', 'true').lower() != 'false':
+                found.setdefault('guid', (child.text or '').strip())
+            continue
+        if child.get('type') == 'xhtml':
+            value = _inner_xhtml(child)
+        else:
+            value = ''.join(child.itertext())
+        found.setdefault(field, value.strip())
+
+    published = found.get('published', found.get('updated', ''))
+    return {
+        'title': found.get('title', 'No title'),
+        # Atom entries without an alternate link are known by their <id>
+        'url': found.get('link') or found.get('guid') or found.get('id', ''),
+        'published': published,
+        'published_ts': parse_timestamp(published),
+        # Like feedparser, fall back from the summary to the content and back
+        'summary': found.get('summary', found.get('content', '')),
+        'content': found.get('content', found.get('summary', '')),
+    }
+
+
+def read_entries(chunks, limit=20, max_bytes=MAX_FEED_BYTES):
+    """Read up to `limit` entries from an iterable of byte chunks.
+
+    Returns (entries, data). `entries` is a list of dicts with the raw
+    title, url, published, summary and content of each entry, plus the
+    publish time as UTC epoch seconds in `published_ts`, or None when
+    the document isn't well-formed XML. `data` is every byte read. Reading
+    stops once `limit` entries are complete or `max_bytes` have been read.
+    When parsing fails, the rest of the document is still read, up to
+    `max_bytes`, so it can go to a more lenient parser.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    buffer = []
+    size = 0
+    entries = []
+    parents = []
+    chunks = iter(chunks)
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == 'start':
+                    parents.append(element)
+                    continue
+                parents.pop()
+                if element.tag in ENTRY_TAGS:
+                    entries.append(_entry(element))
+                    # Finished entries needn't stay in the tree
+                    if parents:
+                        parents[-1].remove(element)
+                    if len(entries) >= limit:
+                        return entries, b''.join(buffer)
+            if size >= max_bytes:
+                break
+        else:
+            parser.close()
+    except ET.ParseError:
+        for chunk in chunks:
+            if size >= max_bytes:
+                break
+            buffer.append(chunk)
+            size += len(chunk)
+        return None, b''.join(buffer)
+    return entries, b''.join(buffer)
@@ -0,0 +1,653 @@
+"""
+Feed discovery, fetching and parsing.
+
+Nothing here touches Streamlit, so the same code serves the web UI, the
+command line and scheduled jobs. Heavy dependencies (feedparser,
+BeautifulSoup, requests) are imported on first use.
+"""
+
+import calendar
+import hashlib
+import logging
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
+from datetime import datetime, timedelta
+from urllib.parse import urljoin, urlparse
+
+from . import health, metrics, schedule, storage, summary_cache, workers
+from .feed_stream import CHUNK_SIZE, MAX_FEED_BYTES, read_entries
+from .fulltext import fetch_article_bodies
+from .http_client import http_get
+from .text_clean import clean_entry_text
+from .threads import run_in_threads
+
+logger = logging.getLogger(__name__)
+
+
+# Known RSS feeds for major sites
+KNOWN_RSS_FEEDS = {
+    'bbc.com': 'http://feeds.bbci.co.uk/news/rss.xml',
+    'bbc.co.uk': 'http://feeds.bbci.co.uk/news/rss.xml',
+    'reuters.com': 'https://www.reutersagency.com/feed/?best-topics=business-finance&post_type=best',
+    'cnn.com': 'http://rss.cnn.com/rss/cnn_topstories.rss',
+    'nytimes.com': 'https://rss.nytimes.com/services/xml/rss/nyt/HomePage.xml',
+    'theguardian.com': 'https://www.theguardian.com/rss',
+    'washingtonpost.com': 'https://feeds.washingtonpost.com/rss/world',
+    'apnews.com': 'https://rsshub.app/apnews/topics/apf-topnews',
+    'npr.org': 'https://feeds.npr.org/1001/rss.xml',
+    'foxnews.com': 'https://moxie.foxnews.com/google-publisher/latest.xml',
+    'wsj.com': 'https://feeds.a.dj.com/rss/RSSWorldNews.xml',
+    'techcrunch.com': 'https://techcrunch.com/feed/',
+    'wired.com': 'https://www.wired.com/feed/rss',
+    'arstechnica.com': 'http://feeds.arstechnica.com/arstechnica/index',
+    'theverge.com': 'https://www.theverge.com/rss/index.xml',
+    'bloomberg.com': 'https://feeds.bloomberg.com/markets/news.rss',
+    'ft.com': 'https://www.ft.com/?format=rss',
+    'economist.com': 'https://www.economist.com/rss',
+}
+
+
+# How much of a candidate feed to read when checking that it really is one
+FEED_SNIFF_BYTES = 16 * 1024
+
+
+# sniff_feed() results, weakest first
+NOT_A_FEED, FEED_ROOT, FEED_WITH_ENTRIES = 0, 1, 2
+
+
+# Check whether a URL serves an RSS/Atom feed by reading only its first few KB
+def sniff_feed(url, timeout=5, max_bytes=FEED_SNIFF_BYTES, deadline=None):
+    """Return FEED_WITH_ENTRIES, FEED_ROOT or NOT_A_FEED (all but the last are true).
+
+    The root element decides: a long channel header can push the first
+    <item> past what we read, so seeing one only ranks the candidate higher.
+    """
+    with http_get(url, timeout=timeout, stream=True, deadline=deadline) as response:
+        if response.status_code != 200:
+            return NOT_A_FEED
+        head = b''
+        for chunk in response.iter_content(4096):
+            head += chunk
+            if len(head) >= max_bytes:
+                break
+    head = head[:max_bytes].lower()
+    if b'<html' in head or not any(tag in head for tag in (b'<rss', b'<feed', b'<rdf:rdf')):
+        return NOT_A_FEED
+    return FEED_WITH_ENTRIES if b'<item' in head or b'<entry' in head else FEED_ROOT
+
+
+# Run a check over candidate URLs concurrently and return the best that passes
+def first_matching_url(check, urls, deadline, max_workers=16, timeout=5, best=True):
+    """Return the first URL whose `check(url, timeout, deadline=deadline)` result reaches `best`, or None.
+
+    Stops waiting as soon as one does or `deadline` (a time.monotonic()
+    value) passes; checks still in flight are abandoned. Failing that, the
+    URL with the highest true result among the finished checks wins, the
+    earlier candidate on a tie.
+    """
+    remaining = deadline - time.monotonic()
+    if not urls or remaining <= 0:
+        return None
+
+    passed = {}
+    with closing(run_in_threads(lambda url: check(url, min(timeout, remaining), deadline=deadline),
+                                urls, max_workers, remaining)) as results:
+        for url, result, error in results:
+            if error is None and result:
+                if result >= best:
+                    return url
+                passed[url] = result
+    if not passed:
+        return None
+    return max((url for url in urls if url in passed), key=passed.get)
+
+
+# Key a source is stored under, e.g. "bbc.com" for "https://www.BBC.com/news"
+def clean_domain(value):
+    """Bare domain of a URL or domain name, without scheme or www."""
+    value = value.strip()
+    domain = urlparse(value).netloc if '://' in value else value.split('/')[0]
+    domain = domain.lower()
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+# Find RSS feed from website
+@metrics.timed('discover')
+def find_rss_feed(url, budget=20):
+    """Attempt to find RSS feed URL from a website within `budget` seconds"""
+    deadline = time.monotonic() + budget
+    try:
+        # Check known feeds first
+        domain = clean_domain(url)
+        if domain in KNOWN_RSS_FEEDS:
+            return KNOWN_RSS_FEEDS[domain]
+
+        # Ensure URL has protocol
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+
+        from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+        # Suppress XML parsing warning
+        warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+
+        response = http_get(url, timeout=min(10, budget), deadline=deadline)
+        soup = BeautifulSoup(response.content, 'html.parser')
+
+        # Look for RSS links in <link> tags
+        rss_links = []
+        for link in soup.find_all('link', type=['application/rss+xml', 'application/atom+xml']):
+            if link.get('href'):
+                rss_links.append(urljoin(url, link['href']))
+
+        # Look for RSS links in page content
+        if not rss_links:
+            for a in soup.find_all('a', href=True):
+                href = a['href'].lower()
+                if any(term in href for term in ['rss', 'feed', 'atom', 'xml']):
+                    if any(term in href for term in ['.xml', '/rss', '/feed', '/atom']):
+                        full_url = urljoin(url, a['href'])
+                        rss_links.append(full_url)
+
+        # Try common RSS paths, all at once; the first one serving a feed wins
+        if not rss_links:
+            common_paths = ['/rss', '/feed', '/rss.xml', '/feed.xml', '/atom.xml',
+                          '/index.xml', '/feeds', '/blog/feed', '/news/rss',
+                          '/rss/news', '/feed/news', '/?feed=rss2', '/feed.rss']
+            base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+
+            return first_matching_url(sniff_feed, [urljoin(base_url, path) for path in common_paths],
+                                      deadline, best=FEED_WITH_ENTRIES)
+
+        # Validate RSS links
+        # Check first 3 candidates
+        return first_matching_url(sniff_feed, rss_links[:3], deadline, best=FEED_WITH_ENTRIES)
+
+    except Exception as e:
+        logger.error("Error finding RSS feed for %s: %s", url, e)
+        return None
+
+
+# Name shown for a source nobody has named, e.g. "Theguardian" for theguardian.com
+def default_display_name(domain):
+    return domain.replace('.com', '').replace('.org', '').replace('.net', '').title()
+
+
+# Get or fetch RSS URL
+def get_rss_url(domain):
+    # Check cache
+    source = clean_domain(domain)
+    result = storage.get_feed(source)
+
+    if result and result[0]:
+        # If fetched successfully within last 7 days, use cached
+        if result[1]:
+            last_success = result[1]
+            if datetime.now() - last_success < timedelta(days=7):
+                return result[0]
+
+    # Find RSS feed
+    rss_url = find_rss_feed(domain)
+
+    # Determine display name
+    display_name = default_display_name(source)
+
+    # Update cache
+    storage.save_discovered_feed(source, rss_url, display_name)
+    return rss_url
+
+
+# Fetch and parse a single feed, raising on failure (safe to call from worker threads)
+def fetch_feed(rss_url, limit=20, timeout=15, etag=None, last_modified=None, known=None, clean=True,
+               deadline=None):
+    """Download and parse one RSS/Atom feed.
+
+    Sends `etag`/`last_modified` as conditional GET validators when given.
+    Returns a dict with the parsed `articles` (None when the server answered
+    304 Not Modified), `not_modified`, the response's new validators, the
+    channel's `ttl`/`skip_hours` scheduling hints and the `seconds` the
+    fetch took. `known` is passed through to parse_feed(), and `deadline`
+    (a time.monotonic() value) bounds the request's retries.
+
+    The body is parsed as it downloads, and the download stops once `limit`
+    entries are read or after MAX_FEED_BYTES.
+
+    With `clean=False` the CPU-bound work is left for the caller (see
+    clean_feed_results()): new entries in `articles` keep their raw HTML and
+    are listed by index in `fresh`, and a feed only feedparser can read comes
+    back as raw bytes in `unparsed`, with `articles` empty.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    start = time.perf_counter()
+    response = None
+    data = b''
+    try:
+        with metrics.timer('http'):
+            response = http_get(rss_url, timeout=timeout, headers=headers, stream=True,
+                                deadline=deadline)
+        # Time to response headers, including DNS and connection setup
+        metrics.observe('http.headers', response.elapsed.total_seconds())
+
+        not_modified = response.status_code == 304
+        # A 304 may omit unchanged validators; a 200 replaces them with exactly what it sent
+        result = {
+            'articles': None,
+            'not_modified': not_modified,
+            'etag': response.headers.get('ETag', etag if not_modified else None),
+            'last_modified': response.headers.get('Last-Modified',
+                                                  last_modified if not_modified else None),
+            'ttl': None,
+            'skip_hours': (),
+        }
+        if not result['not_modified']:
+            response.raise_for_status()
+            # Stops downloading once `limit` entries are read
+            articles, data, fresh = _read_feed(response.iter_content(CHUNK_SIZE), limit, known,
+                                               clean=clean)
+            result['ttl'], result['skip_hours'] = schedule.parse_schedule_hints(data)
+            result['articles'] = articles if articles is not None else []
+            if not clean:
+                result['fresh'] = fresh or []
+                result['unparsed'] = data if articles is None else None
+    except Exception as e:
+        metrics.record_feed(rss_url, time.perf_counter() - start, error=str(e))
+        raise
+    finally:
+        if response is not None:
+            response.close()
+
+    result['seconds'] = time.perf_counter() - start
+    metrics.record_feed(rss_url, result['seconds'], len(data),
+                        None if result['articles'] is None else len(result['articles']),
+                        response.status_code)
+    return result
+
+
+# Stable key for an article in article_cache
+def article_url_hash(url, title=''):
+    return hashlib.md5((url or title).encode()).hexdigest()
+
+
+# Parse feed bytes into cleaned article dicts
+def parse_feed(data, limit=20, known=None):
+    """Parse feed bytes into article dicts.
+
+    `known` maps url_hash to previously stored articles; entries whose raw
+    title, date, summary and content are unchanged reuse the stored (already
+    cleaned) article instead of being cleaned again.
+    """
+    chunks = (data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
+    return _read_feed(chunks, limit, known)[0]
+
+
+def _read_feed(chunks, limit, known=None, max_bytes=MAX_FEED_BYTES, clean=True):
+    """Read up to `limit` articles from feed byte chunks.
+
+    Returns (articles, bytes read, indices of articles left uncleaned). With
+    `clean=False`, new articles keep their raw HTML, and a feed that needs
+    feedparser is left unparsed with articles None.
+    """
+    with metrics.timer('parse.stream'):
+        entries, data = read_entries(chunks, limit, max_bytes)
+    if not entries:
+        if not clean:
+            return None, data, None
+        # Not well-formed XML (or no entries found): let feedparser have a go
+        entries = _feedparser_entries(data, limit)
+    articles, fresh = _match_known(entries, known)
+    if clean:
+        _clean_articles(articles, fresh)
+        fresh = []
+    return articles, data, fresh
+
+
+def _feedparser_entries(data, limit):
+    """Raw entry fields as read by feedparser, which copes with malformed feeds"""
+    import feedparser
+
+    with metrics.timer('parse.feedparser'):
+        feed = feedparser.parse(data)
+
+    entries = []
+    for entry in feed.entries[:limit]:
+        # feedparser normalizes the dates it understands to UTC struct_times
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        fields = {
+            'title': entry.get('title', 'No title'),
+            'url': entry.get('link', ''),
+            'published': entry.get('published', entry.get('updated', '')),
+            'published_ts': calendar.timegm(parsed) if parsed else None,
+            'summary': entry.get('summary', ''),
+            'content': ''
+        }
+
+        # Try to get full content
+        if 'content' in entry:
+            fields['content'] = entry.content[0].value
+        elif 'description' in entry:
+            fields['content'] = entry.description
+        entries.append(fields)
+    return entries
+
+
+def _match_known(entries, known=None):
+    """Key raw entries, returning (articles, indices of the ones still to clean).
+
+    Entries unchanged since they were stored reuse the stored, already
+    cleaned article.
+    """
+    known = known or {}
+
+    articles = []
+    fresh = []
+    for article in entries:
+        article['url_hash'] = article_url_hash(article['url'], article['title'])
+        article['entry_hash'] = hashlib.md5('\x00'.join(
+            [article['title'], article['published'], article['summary'], article['content']]
+        ).encode()).hexdigest()
+
+        # Unchanged since we last stored it: skip the cleaning work
+        stored = known.get(article['url_hash'])
+        if stored and stored.get('entry_hash') == article['entry_hash']:
+            articles.append(dict(stored))
+            continue
+
+        fresh.append(len(articles))
+        articles.append(article)
+
+    return articles, fresh
+
+
+def _clean_articles(articles, fresh):
+    """Clean HTML from the content and summary of the articles at `fresh`"""
+    for i in fresh:
+        article = articles[i]
+        with metrics.timer('parse.clean'):
+            article['content'], article['summary'] = clean_entry_text(article['content'], article['summary'])
+
+
+def _build_articles(entries, known=None):
+    """Turn raw entry fields into cleaned article dicts"""
+    articles, fresh = _match_known(entries, known)
+    _clean_articles(articles, fresh)
+    return articles
+
+
+# Fetch articles from RSS feed
+def fetch_articles(rss_url, limit=20, timeout=15):
+    try:
+        return fetch_feed(rss_url, limit=limit, timeout=timeout)['articles']
+    except Exception as e:
+        logger.error("Error fetching articles from %s: %s", rss_url, e)
+        return []
+
+
+def _clean_jobs(jobs):
+    """Clean several feeds' entries in one go (runs in a worker process).
+
+    Each job is a list of raw (content, summary) pairs, returned cleaned, or
+    (feed bytes, limit) for a feed only feedparser can read, returned as
+    finished articles.
+    """
+    results = []
+    for job in jobs:
+        if isinstance(job, tuple):
+            data, limit = job
+            results.append(_build_articles(_feedparser_entries(data, limit)))
+        else:
+            results.append([clean_entry_text(content, summary) for content, summary in job])
+    return results
+
+
+class _CleaningBatches:
+    """Sends fetched feeds' cleaning work to a process pool in batches.
+
+    A feed goes out in a task of its own while the pool has idle workers.
+    Once every worker is busy, waiting feeds are grouped into tasks of up to
+    workers.BATCH_ENTRIES entries.
+    """
+
+    def __init__(self, processes, limit):
+        self.pool = workers.get_pool(processes)
+        self.workers = workers.pool_size(processes)
+        self.limit = limit
+        self.waiting = []
+        self.waiting_entries = 0
+        # future -> [(source, result), ...]
+        self.tasks = {}
+
+    def add(self, source, result):
+        """Queue a fetch_feed(clean=False) result, returning False if it needs no work"""
+        fresh = result.pop('fresh', [])
+        unparsed = result.pop('unparsed', None)
+        if unparsed is not None:
+            job, entries = (unparsed, self.limit), self.limit
+        elif fresh:
+            articles = result['articles']
+            job = [(articles[i]['content'], articles[i]['summary']) for i in fresh]
+            entries = len(job)
+        else:
+            return False
+        self.waiting.append((source, result, fresh, job))
+        self.waiting_entries += entries
+        self.pump()
+        return True
+
+    def pump(self):
+        """Submit waiting work while workers are idle or a batch is full"""
+        while self.waiting and (len(self.tasks) < self.workers
+                                or self.waiting_entries >= workers.BATCH_ENTRIES):
+            batch, entries = [], 0
+            while self.waiting and (not batch or entries < workers.BATCH_ENTRIES):
+                item = self.waiting.pop(0)
+                batch.append(item)
+                entries += len(item[3]) if isinstance(item[3], list) else self.limit
+            self.waiting_entries -= entries
+            future = self.pool.submit(_clean_jobs, [job for _, _, _, job in batch])
+            self.tasks[future] = batch
+
+    def finish(self, future):
+        """Yield (source, result, error) for each feed in a completed task"""
+        batch = self.tasks.pop(future)
+        try:
+            outputs = future.result()
+        except Exception as e:
+            for source, _, _, _ in batch:
+                yield source, None, str(e)
+            return
+        finally:
+            self.pump()
+        for (source, result, fresh, job), output in zip(batch, outputs):
+            if isinstance(job, tuple):
+                result['articles'] = output
+            else:
+                for i, (content, summary) in zip(fresh, output):
+                    result['articles'][i]['content'] = content
+                    result['articles'][i]['summary'] = summary
+            yield source, result, None
+
+    def abandon(self):
+        """Cancel outstanding work, returning the sources it was for"""
+        sources = [source for source, _, _, _ in self.waiting]
+        for future, batch in self.tasks.items():
+            future.cancel()
+            sources.extend(source for source, _, _, _ in batch)
+        self.waiting, self.tasks = [], {}
+        return sources
+
+
+# Fetch many feeds concurrently
+def fetch_all_feeds(feeds, limit=20, max_workers=8, feed_timeout=15, total_timeout=45,
+                    validators=None, cached=None, processes=None):
+    """Fetch feeds concurrently, yielding (source, result, error) as each one finishes.
+
+    `feeds` is a list of (source, rss_url) pairs, `validators` an optional
+    mapping of source to (etag, last_modified) and `cached` an optional mapping
+    of source to its stored articles; `result` is what fetch_feed() returns.
+    Each download is bounded by `feed_timeout` and the whole batch by
+    `total_timeout`; sources still running when the overall deadline passes
+    are reported with a timeout error.
+
+    With `processes`, entries are cleaned in that many worker processes (0
+    for one per core) rather than on the download threads; see workers.py.
+    """
+    if not feeds:
+        return
+    validators = validators or {}
+    cached = cached or {}
+    batches = None if processes is None else _CleaningBatches(processes, limit)
+
+    deadline = time.monotonic() + total_timeout
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(feeds)))
+    futures = {
+        executor.submit(fetch_feed, rss_url, limit, feed_timeout,
+                        *validators.get(source, (None, None)),
+                        known={a['url_hash']: a for a in cached.get(source, [])},
+                        clean=batches is None, deadline=deadline): source
+        for source, rss_url in feeds
+    }
+    pending = set(futures)
+    try:
+        while pending or (batches and (batches.tasks or batches.waiting)):
+            running = pending | set(batches.tasks) if batches else pending
+            done, _ = wait(running, timeout=max(deadline - time.monotonic(), 0),
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future not in futures:
+                    yield from batches.finish(future)
+                    continue
+                pending.discard(future)
+                source = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield source, None, str(e)
+                    continue
+                if batches is None or not batches.add(source, result):
+                    yield source, result, None
+
+        # Whatever is still running missed the overall deadline
+        error = f"Timed out after {total_timeout}s"
+        urls = dict(feeds)
+        for future in pending:
+            future.cancel()
+            metrics.record_feed(urls[futures[future]], total_timeout, error=error)
+            yield futures[future], None, error
+        for source in batches.abandon() if batches else ():
+            yield source, None, error
+    finally:
+        # Don't wait for stragglers; their sockets are bounded by feed_timeout
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Fetch feeds and keep the article store up to date
+def refresh_feeds(feeds, limit=20, full_text=False, precompute_summaries=False, processes=None,
+                  **fetch_options):
+    """Fetch feeds into the article store, yielding (source, articles, error) as each finishes.
+
+    `feeds` is a list of (source, rss_url) pairs as returned by
+    storage.get_feed_urls(). Conditional GET validators and previously stored
+    articles are looked up first, so unchanged feeds cost a 304 and unchanged
+    entries skip cleaning. Every changed feed is written in one transaction
+    once the batch is done, along with each feed's next poll time and health.
+
+    Feeds whose circuit is open after repeated failures (see health.py) are
+    not fetched: they are yielded first, with their stored articles and an
+    error saying when they will be tried again.
+
+    Once the batch is stored, `full_text` downloads the pages of new and
+    edited articles for their full text (see fulltext.py), and
+    `precompute_summaries` summarizes them into the summary cache so a later
+    bulletin doesn't have to. Either way they are updated after being
+    yielded. `processes` moves cleaning and summarizing to worker processes
+    (see workers.py).
+    """
+    sources = [source for source, _ in feeds]
+    validators = storage.get_feed_validators(sources)
+    cached = storage.get_cached_articles_by_source(sources)
+    poll_state = storage.get_poll_state(sources)
+    feed_health = storage.get_feed_health(sources)
+
+    feeds, skipped = health.plan(feeds, feed_health, datetime.now())
+    for source, _ in skipped:
+        failures, last_error, _, retry_at = feed_health[source]
+        for article in cached[source]:
+            article['source'] = source
+        yield source, cached[source], (f"Skipped after {failures} failures in a row "
+                                       f"({last_error}); next try after {retry_at:%H:%M}")
+
+    to_save = []
+    polls = []
+    health_updates = []
+    try:
+        for source, result, error in fetch_all_feeds(feeds, limit, validators=validators,
+                                                     cached=cached, processes=processes,
+                                                     **fetch_options):
+            interval, last_checked, ttl, skip_hours = poll_state.get(source, (None, None, None, None))
+            skip_hours = schedule.decode_skip_hours(skip_hours)
+            failures, _, latency, _ = feed_health.get(source, (0, None, None, None))
+            now = datetime.now()
+
+            if error:
+                # Try again after the usual interval, or once the circuit half-opens
+                failures += 1
+                retry_at = health.retry_after(now, failures)
+                interval = interval or schedule.DEFAULT_INTERVAL
+                next_poll = schedule.next_poll_time(now, interval, skip_hours)
+                polls.append((source, False, interval,
+                              max(next_poll, retry_at) if retry_at else next_poll, None, None))
+                health_updates.append((source, failures, error, latency, retry_at))
+                yield source, [], error
+                continue
+
+            health_updates.append((source, 0, None,
+                                   health.average_latency(latency, result['seconds']), None))
+
+            if result['not_modified']:
+                # Unchanged since last poll: reuse what we parsed then
+                articles = cached[source]
+                new_items = 0
+            else:
+                articles = result['articles']
+                ttl, skip_hours = result['ttl'], result['skip_hours']
+                to_save.append((source, articles, result['etag'], result['last_modified']))
+                if cached[source]:
+                    seen = {article['url_hash'] for article in cached[source]}
+                    new_items = sum(1 for article in articles if article['url_hash'] not in seen)
+                else:
+                    new_items = None
+
+            elapsed = (now - last_checked).total_seconds() if last_checked else None
+            interval = schedule.next_interval(interval, new_items, elapsed, ttl)
+            polls.append((source, True, interval,
+                          schedule.next_poll_time(now, interval, skip_hours),
+                          ttl, schedule.encode_skip_hours(skip_hours)))
+
+            for article in articles:
+                article['source'] = source
+            yield source, articles, None
+    finally:
+        # Store every changed feed and every feed's schedule and health in one transaction
+        storage.save_fetch_results(to_save, polls, health_updates)
+
+    if not (full_text or precompute_summaries):
+        return
+    changed = []
+    for source, articles, _, _ in to_save:
+        seen = {article['entry_hash'] for article in cached[source]}
+        changed.extend(article for article in articles if article['entry_hash'] not in seen)
+    if full_text:
+        for article, error in fetch_article_bodies(changed):
+            if error:
+                logger.warning("Could not fetch the full text of %s: %s", article['url'], error)
+    if precompute_summaries:
+        summary_cache.precompute(changed, processes=processes)
@@ -0,0 +1,310 @@
+"""
+Full article text for feeds that only ship a teaser.
+
+Many feeds (BBC, CNN, NPR, ...) carry a one-line description, which makes
+for thin summaries. fetch_article_bodies() downloads the linked pages
+concurrently, never more than `per_host` at a time from one site, and
+extract_main_text() pulls the body text out of each one.
+
+The extractor works like Readability without building a DOM: the page is
+streamed through html.parser, boilerplate (scripts, navigation, sidebars,
+comment and share widgets) is dropped, and every run of text scores the
+elements around it by its length and commas. The text under the
+best-scoring element is the article.
+
+Extracted text replaces the stored article's content, and each page is
+downloaded at most once: later calls read it back from the article store.
+"""
+
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+from . import metrics, storage
+from .http_client import http_get
+from .text_clean import VOID_TAGS
+from .threads import run_in_threads
+
+# Pages downloaded at once from one host, and in total
+PER_HOST = 2
+MAX_WORKERS = 8
+
+# Client errors that say "not now" rather than "never"
+TRANSIENT_STATUSES = frozenset([408, 429])
+
+# Stop reading pages larger than this
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# Runs of text shorter than this don't count as paragraphs
+MIN_RUN_LENGTH = 25
+
+# Elements whose text is never part of the article
+SKIP_TAGS = frozenset([
+    'script', 'style', 'noscript', 'template', 'svg', 'nav', 'aside', 'footer',
+    'header', 'form', 'button', 'select', 'iframe', 'object', 'figure', 'menu',
+])
+
+# Elements that start a new run of text; the rest are inline
+BLOCK_TAGS = frozenset([
+    'p', 'div', 'section', 'article', 'main', 'body', 'td', 'th', 'tr', 'table',
+    'li', 'ul', 'ol', 'dl', 'dd', 'dt', 'blockquote', 'pre', 'br', 'hr',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'figcaption', 'address',
+])
+
+# Elements whose end tag is optional before the next one of the same kind
+SIBLING_TAGS = frozenset(['li', 'dt', 'dd', 'td', 'th', 'tr', 'option'])
+
+HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+
+# Paragraph elements, kept in full however short they are
+PARAGRAPH_TAGS = frozenset(['p', 'blockquote', 'pre'])
+
+# Starting scores for candidate containers, as in Readability
+TAG_SCORES = {
+    'article': 10, 'main': 10, 'div': 5, 'section': 3, 'td': 3, 'blockquote': 3, 'pre': 3,
+    'ol': -3, 'ul': -3, 'dl': -3, 'li': -3, 'th': -5,
+    'h1': -5, 'h2': -5, 'h3': -5, 'h4': -5, 'h5': -5, 'h6': -5,
+}
+
+# class/id values marking boilerplate, unless they also look like content
+_UNLIKELY = re.compile(
+    r'-ad-|ad-break|agegate|banner|breadcrumb|combx|comment|community|cookie|disqus|extra|'
+    r'footer|gdpr|header|legends|menu|newsletter|pager|pagination|popup|promo|related|remark|'
+    r'replies|rss|share|shoutbox|sidebar|skyscraper|social|sponsor|subscribe|supplemental',
+    re.I)
+_MAYBE_CONTENT = re.compile(r'and|article|body|column|content|main|shadow|story', re.I)
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+
+
+class _BodyExtractor(HTMLParser):
+    """Splits a page into runs of text and scores the elements containing them"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Open elements as (tag, node id, skipped)
+        self._stack = []
+        self._next_id = 0
+        self._skipping = 0
+        self._text = []
+        self._link_chars = 0
+        self._in_link = 0
+        self.tags = {}
+        self.scores = defaultdict(float)
+        # (text, tag, ids of the enclosing elements)
+        self.runs = []
+
+    def _end_run(self):
+        if not self._text:
+            return
+        text = ' '.join(''.join(self._text).split())
+        link_chars, self._text, self._link_chars = self._link_chars, [], 0
+        if not text or not self._stack or link_chars > len(text) / 2:
+            return
+        tag = self._stack[-1][0]
+        ancestors = tuple(node for _, node, _ in self._stack)
+        self.runs.append((text, tag, ancestors))
+        if len(text) < MIN_RUN_LENGTH or tag in HEADING_TAGS:
+            return
+
+        # The paragraph's parent gets the full score, its grandparent half
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        containers = ancestors[-2:-4:-1] or ancestors[-1:]
+        for level, node in enumerate(containers):
+            if node not in self.scores:
+                self.scores[node] = TAG_SCORES.get(self.tags[node], 0)
+            self.scores[node] += score / (level + 1)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS and not self._skipping:
+                self._end_run()
+            return
+        if tag in BLOCK_TAGS and not self._skipping:
+            self._end_run()
+        # A block implicitly closes an open <p>, and a list item or cell its open sibling
+        if self._stack:
+            open_tag = self._stack[-1][0]
+            if (open_tag == 'p' and tag in BLOCK_TAGS) or (open_tag == tag and tag in SIBLING_TAGS):
+                self._close(open_tag)
+
+        skip = tag in SKIP_TAGS
+        if not skip and tag not in ('html', 'body', 'article', 'main'):
+            names = ' '.join(value for name, value in attrs if name in ('class', 'id') and value)
+            skip = bool(names) and bool(_UNLIKELY.search(names)) and not _MAYBE_CONTENT.search(names)
+        self._skipping += skip
+        if tag == 'a':
+            self._in_link += 1
+
+        self._stack.append((tag, self._next_id, skip))
+        self.tags[self._next_id] = tag
+        self._next_id += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS and not self._skipping:
+            self._end_run()
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or not any(open_tag == tag for open_tag, _, _ in self._stack):
+            return
+        self._close(tag)
+
+    def _close(self, tag):
+        if not self._skipping:
+            self._end_run()
+        # Close everything up to the matching open tag
+        while self._stack:
+            closed, _, skip = self._stack.pop()
+            self._skipping -= skip
+            if closed == 'a':
+                self._in_link -= 1
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if self._skipping:
+            return
+        self._text.append(data)
+        if self._in_link:
+            self._link_chars += len(data.strip())
+
+    def close(self):
+        super().close()
+        if not self._skipping:
+            self._end_run()
+
+
+def extract_main_text(html):
+    """Return the main body text of an article page, paragraphs separated by blank lines"""
+    if not html:
+        return ''
+    parser = _BodyExtractor()
+    parser.feed(html)
+    parser.close()
+    if not parser.scores:
+        return ''
+
+    top = max(parser.scores, key=parser.scores.get)
+    paragraphs = [text for text, tag, ancestors in parser.runs
+                  if top in ancestors and tag not in HEADING_TAGS
+                  and (tag in PARAGRAPH_TAGS or len(text) >= MIN_RUN_LENGTH)]
+    return '\n\n'.join(paragraphs)
+
+
+def _decode(data, content_type):
+    """Decode page bytes using the declared charset, falling back to UTF-8"""
+    charset = None
+    if 'charset=' in content_type:
+        charset = content_type.split('charset=', 1)[1].split(';')[0].strip(' "\'')
+    else:
+        match = _META_CHARSET.search(data[:4096])
+        if match:
+            charset = match.group(1).decode('ascii')
+    try:
+        return data.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return data.decode('utf-8', errors='replace')
+
+
+def fetch_page_text(url, timeout=10, max_bytes=MAX_PAGE_BYTES, deadline=None):
+    """Download an article page and extract its body text.
+
+    Returns '' for pages with nothing to extract, including client errors
+    and non-HTML responses, which are not worth retrying. Network and server
+    errors raise, as do rate limits and request timeouts (429, 408), so the
+    page is tried again later.
+    """
+    with metrics.timer('fulltext.http'):
+        response = http_get(url, timeout=timeout, stream=True, deadline=deadline)
+        try:
+            status = response.status_code
+            if 400 <= status < 500 and status not in TRANSIENT_STATUSES:
+                return ''
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and 'html' not in content_type:
+                return ''
+            chunks, size = [], 0
+            for chunk in response.iter_content(64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    break
+        finally:
+            response.close()
+
+    with metrics.timer('fulltext.extract'):
+        return extract_main_text(_decode(b''.join(chunks), content_type))
+
+
+def _interleave_hosts(articles):
+    """Order articles round-robin by host, so workers don't queue behind one site"""
+    by_host = defaultdict(deque)
+    for article in articles:
+        by_host[urlparse(article['url']).netloc].append(article)
+    queues = list(by_host.values())
+    ordered = []
+    while queues:
+        ordered.extend(queue.popleft() for queue in queues)
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
+def fetch_article_bodies(articles, max_workers=MAX_WORKERS, per_host=PER_HOST, timeout=10,
+                         total_timeout=120):
+    """Fill in articles' full text, yielding (article, error) as each one finishes.
+
+    Articles are updated in place: their `content` becomes the extracted
+    body when that is longer than what the feed supplied. Pages fetched
+    before are read back from the article store instead of downloaded, and
+    new results are stored in one transaction once the batch is done. Each
+    download is bounded by `timeout` and the whole batch by `total_timeout`.
+    Pages that failed with a network or server error are tried again next
+    time.
+    """
+    articles = [article for article in articles
+                if article.get('url', '').startswith(('http://', 'https://'))]
+    if not articles:
+        return
+
+    stored = storage.get_article_bodies([article['url_hash'] for article in articles])
+    to_fetch = []
+    for article in articles:
+        if article['url_hash'] not in stored:
+            to_fetch.append(article)
+            continue
+        if len(stored[article['url_hash']] or '') > len(article.get('content') or ''):
+            article['content'] = stored[article['url_hash']]
+        yield article, None
+    if not to_fetch:
+        return
+
+    host_slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+    slots_lock = threading.Lock()
+    deadline = time.monotonic() + total_timeout
+
+    def fetch(article):
+        with slots_lock:
+            slot = host_slots[urlparse(article['url']).netloc]
+        with slot:
+            return fetch_page_text(article['url'], timeout, deadline=deadline)
+
+    bodies = []
+    try:
+        for article, text, error in run_in_threads(fetch, _interleave_hosts(to_fetch),
+                                                   max_workers, total_timeout):
+            if error:
+                yield article, str(error)
+                continue
+            if len(text) > len(article.get('content') or ''):
+                article['content'] = text
+                bodies.append((article['url_hash'], text))
+            else:
+                # Nothing better than the feed's text; don't download it again
+                bodies.append((article['url_hash'], None))
+            yield article, None
+    finally:
+        storage.save_article_bodies(bodies)
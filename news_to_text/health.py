@@ -0,0 +1,88 @@
+"""
+Feed health and circuit breaker.
+
+Every poll updates a feed's health: consecutive failures, the last error,
+an average fetch latency and when it may next be tried. A feed that has
+failed FAILURE_THRESHOLD times in a row is "open": refresh_feeds() skips it
+and serves its stored articles instead of waiting out another timeout.
+Once its backoff has passed it is "half-open" and gets a single probe,
+fetched after the healthy feeds; success closes the circuit, failure
+reopens it for twice as long, up to MAX_BACKOFF.
+"""
+
+import random
+from datetime import timedelta
+
+# Consecutive failures that open the circuit
+FAILURE_THRESHOLD = 3
+
+# Seconds to wait before the first probe, doubling with each failed probe
+BASE_BACKOFF = 5 * 60
+MAX_BACKOFF = 24 * 60 * 60
+
+# Fraction of the backoff added or removed at random
+JITTER = 0.1
+
+# Weight of the newest fetch in the average latency
+LATENCY_WEIGHT = 0.3
+
+HEALTHY = 'healthy'
+DEGRADED = 'degraded'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Order feeds are fetched in: probes go last so they don't hold up the rest
+_PRIORITY = {HEALTHY: 0, DEGRADED: 1, HALF_OPEN: 2}
+
+
+def backoff(failures):
+    """Seconds to skip a feed after `failures` consecutive failures (0 while closed)"""
+    if failures < FAILURE_THRESHOLD:
+        return 0
+    return min(BASE_BACKOFF * 2 ** (failures - FAILURE_THRESHOLD), MAX_BACKOFF)
+
+
+def retry_after(now, failures, jitter=JITTER, rng=random):
+    """When a feed with `failures` consecutive failures may next be fetched, or None"""
+    seconds = backoff(failures)
+    if not seconds:
+        return None
+    return now + timedelta(seconds=seconds * rng.uniform(1 - jitter, 1 + jitter))
+
+
+def state(failures, retry_at, now):
+    """The circuit state for a feed's (failures, retry_after)"""
+    if not failures:
+        return HEALTHY
+    if failures < FAILURE_THRESHOLD:
+        return DEGRADED
+    if retry_at is not None and now < retry_at:
+        return OPEN
+    return HALF_OPEN
+
+
+def average_latency(previous, seconds):
+    """Exponentially weighted average of fetch latency"""
+    if previous is None:
+        return seconds
+    return previous + LATENCY_WEIGHT * (seconds - previous)
+
+
+def plan(feeds, health, now):
+    """Split (source, rss_url) pairs into (to_fetch, skipped).
+
+    `health` maps source to (failures, last_error, avg_latency,
+    retry_after). Feeds to fetch come healthy first, then degraded, then
+    half-open probes, keeping their order otherwise. Open circuits are
+    skipped.
+    """
+    to_fetch, skipped = [], []
+    for feed in feeds:
+        failures, _, _, retry_at = health.get(feed[0], (0, None, None, None))
+        feed_state = state(failures or 0, retry_at, now)
+        if feed_state == OPEN:
+            skipped.append(feed)
+        else:
+            to_fetch.append((_PRIORITY[feed_state], feed))
+    to_fetch.sort(key=lambda item: item[0])
+    return [feed for _, feed in to_fetch], skipped
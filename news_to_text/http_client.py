@@ -0,0 +1,100 @@
+"""
+Shared HTTP client for feed discovery and feed downloads.
+
+Every network request in the app goes through one pooled requests.Session so
+connections (and TLS sessions) to the same hosts are kept alive and reused
+across fetches and Streamlit reruns.
+"""
+
+import threading
+import time
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Number of hosts to keep connection pools for
+POOL_HOSTS = 64
+
+# Connections kept open for reuse per host. Requests never wait for one:
+# a busy host gets an extra connection, so no thread sits in the pool past
+# its deadline. Callers that hit one site hard cap themselves (see
+# fulltext.PER_HOST); discovery probes at most 16 paths at once.
+PER_HOST_CONNECTIONS = 16
+
+# Connection errors and transient server errors are retried this many
+# times, waiting BACKOFF seconds and then twice as long each time
+RETRIES = 2
+BACKOFF = 0.5
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Imported here so importing the package stays cheap
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.request import ACCEPT_ENCODING
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_HOSTS,
+                    pool_maxsize=PER_HOST_CONNECTIONS,
+                    pool_block=False,
+                    # http_get() retries within the caller's deadline
+                    max_retries=0,
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update({
+                    'User-Agent': USER_AGENT,
+                    # Includes "br" when a brotli decoder is installed
+                    'Accept-Encoding': ACCEPT_ENCODING,
+                    'Connection': 'keep-alive',
+                })
+                _session = session
+    return _session
+
+
+def http_get(url, timeout=10, headers=None, stream=False, deadline=None):
+    """GET a URL through the shared session.
+
+    Connection errors and RETRY_STATUSES responses are retried up to
+    RETRIES times with exponential backoff; read timeouts are not, so a
+    host that never answers costs one `timeout`. Retry-After is ignored,
+    since a server asking for minutes would stall every caller. With
+    `deadline` (a time.monotonic() value), each attempt's timeout is cut
+    to the time left and no retry starts that couldn't finish before it.
+    The last response is returned even if its status was retryable.
+    """
+    import requests
+
+    session = get_session()
+    attempt = 0
+    while True:
+        attempt_timeout = timeout
+        if deadline is not None:
+            attempt_timeout = min(timeout, deadline - time.monotonic())
+            if attempt_timeout <= 0:
+                raise requests.Timeout(f"No time left to fetch {url}")
+        pause = BACKOFF * 2 ** attempt
+        try:
+            response = session.get(url, timeout=attempt_timeout, headers=headers, stream=stream)
+        except requests.ConnectionError:
+            if not _can_retry(attempt, pause, deadline):
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or not _can_retry(attempt, pause, deadline):
+                return response
+            response.close()
+        time.sleep(pause)
+        attempt += 1
+
+
+def _can_retry(attempt, pause, deadline):
+    return attempt < RETRIES and (deadline is None or time.monotonic() + pause < deadline)
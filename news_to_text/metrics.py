@@ -0,0 +1,221 @@
+"""
+Opt-in timing instrumentation for the fetch → clean → summarize pipeline.
+
+Collection is off by default. While it is off, timer() returns a shared
+no-op context manager and timed() functions make one flag check before
+calling through, so leaving the hooks in place costs next to nothing.
+
+    from news_to_text import metrics
+
+    metrics.enable()
+    ...fetch feeds, generate a script...
+    print(metrics.to_prometheus())
+
+Stages record a call count, total and maximum seconds, and counters
+count events such as summary cache hits. Feeds additionally record their
+latest latency, response size, entry count, HTTP status and error.
+Everything is kept in memory for the life of the process; reset() starts
+over.
+"""
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_enabled = False
+_lock = threading.Lock()
+# stage -> [count, total seconds, max seconds]
+_stages = {}
+# counter -> running total
+_counters = {}
+# feed URL -> latest fetch details
+_feeds = {}
+
+_NULL = nullcontext()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+        _feeds.clear()
+
+
+def observe(stage, seconds):
+    """Add one timing to a stage"""
+    if not _enabled:
+        return
+    with _lock:
+        stats = _stages.get(stage)
+        if stats is None:
+            _stages[stage] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            if seconds > stats[2]:
+                stats[2] = seconds
+
+
+def count(name, n=1):
+    """Add `n` to a counter"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _Timer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.start)
+
+
+def timer(stage):
+    """Context manager timing a block as `stage` (a no-op while disabled)"""
+    return _Timer(stage) if _enabled else _NULL
+
+
+def timed(stage):
+    """Decorator timing every call of a function as `stage`"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record_feed(url, seconds=None, size=None, entries=None, status=None, error=None):
+    """Record the outcome of fetching one feed"""
+    if not _enabled:
+        return
+    with _lock:
+        feed = _feeds.setdefault(url, {'fetches': 0, 'errors': 0})
+        feed['fetches'] += 1
+        if error:
+            feed['errors'] += 1
+        feed.update(seconds=seconds, bytes=size, entries=entries, status=status, error=error)
+
+
+def snapshot():
+    """Return {'stages': {...}, 'counters': {...}, 'feeds': {...}} as plain data"""
+    with _lock:
+        stages = {stage: {'count': count, 'total_s': total, 'max_s': longest,
+                          'mean_s': total / count}
+                  for stage, (count, total, longest) in sorted(_stages.items())}
+        counters = dict(sorted(_counters.items()))
+        feeds = {url: dict(feed) for url, feed in sorted(_feeds.items())}
+    return {'stages': stages, 'counters': counters, 'feeds': feeds}
+
+
+def to_json(indent=2):
+    return json.dumps(snapshot(), indent=indent)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def to_prometheus():
+    """Render the current metrics in the Prometheus text exposition format"""
+    data = snapshot()
+    lines = [
+        '# HELP news_to_text_stage_seconds Time spent in each pipeline stage.',
+        '# TYPE news_to_text_stage_seconds summary',
+    ]
+    for stage, stats in data['stages'].items():
+        label = f'{{stage="{_label(stage)}"}}'
+        lines.append(f'news_to_text_stage_seconds_sum{label} {stats["total_s"]:.6f}')
+        lines.append(f'news_to_text_stage_seconds_count{label} {stats["count"]}')
+    lines += [
+        '# HELP news_to_text_stage_max_seconds Slowest single call of each stage.',
+        '# TYPE news_to_text_stage_max_seconds gauge',
+    ]
+    for stage, stats in data['stages'].items():
+        label = f'{{stage="{_label(stage)}"}}'
+        lines.append(f'news_to_text_stage_max_seconds{label} {stats["max_s"]:.6f}')
+    lines += [
+        '# HELP news_to_text_events_total Events counted by the pipeline.',
+        '# TYPE news_to_text_events_total counter',
+    ]
+    for name, total in data['counters'].items():
+        lines.append(f'news_to_text_events_total{{event="{_label(name)}"}} {total}')
+
+    for name, key, kind, help_text in (
+        ('feed_fetches_total', 'fetches', 'counter', 'Fetches of each feed.'),
+        ('feed_errors_total', 'errors', 'counter', 'Failed fetches of each feed.'),
+        ('feed_seconds', 'seconds', 'gauge', 'Latency of the latest fetch of each feed.'),
+        ('feed_bytes', 'bytes', 'gauge', 'Response size of the latest fetch of each feed.'),
+        ('feed_entries', 'entries', 'gauge', 'Entries parsed in the latest fetch of each feed.'),
+    ):
+        lines += [f'# HELP news_to_text_{name} {help_text}', f'# TYPE news_to_text_{name} {kind}']
+        for url, feed in data['feeds'].items():
+            if feed.get(key) is not None:
+                lines.append(f'news_to_text_{name}{{feed="{_label(url)}"}} {feed[key]}')
+    return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def profile(path=None, top=25, stream=None):
+    """Run a block under cProfile, including threads it starts.
+
+    Feeds are fetched on worker threads, which a plain cProfile run would
+    miss, so every thread started inside the block gets its own profiler
+    and the results are merged. Stats are written to `path` (for pstats,
+    snakeviz, ...) when given, and the `top` entries by cumulative time are
+    printed to `stream` when given. Yields the main thread's Profile.
+    """
+    import cProfile
+    import pstats
+    import sys
+
+    profilers = [cProfile.Profile()]
+
+    def start_thread_profiler(*args):
+        sys.setprofile(None)
+        thread_profiler = cProfile.Profile()
+        profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    threading.setprofile(start_thread_profiler)
+    profilers[0].enable()
+    try:
+        yield profilers[0]
+    finally:
+        profilers[0].disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(*profilers, stream=stream)
+        if path:
+            stats.dump_stats(path)
+        if stream is not None:
+            stats.sort_stats('cumulative').print_stats(top)
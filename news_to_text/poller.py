@@ -0,0 +1,77 @@
+"""
+Background feed poller.
+
+    news-to-text poll [--workers 8] [--once]
+
+Keeps the article store fresh so the app and bulletin commands can read
+from it without waiting on the network. Each active feed is refreshed when
+its own next poll time comes round (see schedule.py); feeds that fall due
+together are fetched as one batch, never more than `max_workers` at a time.
+New and edited articles are summarized as they come in, so bulletins built
+from the store find their summaries already cached.
+"""
+
+import logging
+import threading
+from datetime import datetime
+
+from . import storage
+from .feeds import refresh_feeds
+
+logger = logging.getLogger(__name__)
+
+# Longest to sleep between checks, so feeds ticked in the app are picked up soon
+MAX_SLEEP = 60
+
+# Due feeds fetched per batch, as a multiple of the worker count
+BATCH_FACTOR = 4
+
+
+def poll_due(max_workers=8, limit=20, feed_timeout=15, now=None, full_text=False, processes=None):
+    """Refresh every active feed that is due, returning {source: error or None}.
+
+    With `full_text`, new articles' pages are downloaded for their full text.
+    `processes` cleans and summarizes in worker processes (see workers.py).
+    """
+    feeds = storage.get_due_feeds(now, limit=max_workers * BATCH_FACTOR)
+    if not feeds:
+        return {}
+
+    # Enough time for every batch of workers to use its full feed timeout
+    total_timeout = feed_timeout * -(-len(feeds) // max_workers) + feed_timeout
+    outcomes = {}
+    for source, articles, error in refresh_feeds(feeds, limit=limit, max_workers=max_workers,
+                                                 feed_timeout=feed_timeout,
+                                                 total_timeout=total_timeout,
+                                                 full_text=full_text,
+                                                 precompute_summaries=True,
+                                                 processes=processes):
+        outcomes[source] = error
+        if error:
+            logger.warning("Polling %s failed: %s", source, error)
+        else:
+            logger.info("Polled %s: %d articles", source, len(articles))
+    return outcomes
+
+
+def run(max_workers=8, limit=20, feed_timeout=15, stop=None, max_sleep=MAX_SLEEP, full_text=False,
+        processes=None):
+    """Poll due feeds until `stop` (a threading.Event) is set"""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            outcomes = poll_due(max_workers, limit, feed_timeout, full_text=full_text,
+                                processes=processes)
+        except Exception:
+            logger.exception("Polling round failed")
+            outcomes = {}
+
+        # A full batch may mean more feeds are already waiting
+        if len(outcomes) >= max_workers * BATCH_FACTOR:
+            continue
+
+        next_poll = storage.get_next_poll()
+        delay = max_sleep
+        if next_poll is not None:
+            delay = min(max((next_poll - datetime.now()).total_seconds(), 1), max_sleep)
+        stop.wait(delay)
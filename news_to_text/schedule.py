@@ -0,0 +1,99 @@
+"""
+Adaptive polling schedule for feeds.
+
+Each feed gets its own poll interval that shrinks when a poll finds new
+articles and grows when it finds nothing, bounded by MIN_INTERVAL and
+MAX_INTERVAL. A feed's RSS <ttl> sets a lower bound and its <skipHours> are
+never polled. Next-poll times are jittered so feeds don't fire in lockstep.
+"""
+
+import random
+import re
+from datetime import timedelta, timezone
+
+# Seconds
+MIN_INTERVAL = 5 * 60
+MAX_INTERVAL = 6 * 60 * 60
+DEFAULT_INTERVAL = 30 * 60
+
+# Fraction of the interval added or removed at random
+JITTER = 0.1
+
+# Growth factor for polls that find nothing new
+BACKOFF = 1.5
+
+# Channel metadata sits before the first item; don't scan past this
+_HINT_BYTES = 64 * 1024
+
+_TTL = re.compile(rb'<ttl>\s*(\d+)\s*</ttl>', re.I)
+_SKIP_HOURS = re.compile(rb'<skipHours>(.*?)</skipHours>', re.I | re.S)
+_HOUR = re.compile(rb'<hour>\s*(\d+)\s*</hour>', re.I)
+
+
+def parse_schedule_hints(data):
+    """Return (ttl_minutes, skip_hours) advertised by an RSS channel.
+
+    `ttl_minutes` is None when absent and `skip_hours` is a sorted tuple of
+    GMT hours (0-23), empty when absent.
+    """
+    head = data[:_HINT_BYTES]
+    item = head.find(b'<item')
+    if item != -1:
+        head = head[:item]
+
+    match = _TTL.search(head)
+    ttl = int(match.group(1)) if match else None
+
+    skip_hours = ()
+    match = _SKIP_HOURS.search(head)
+    if match:
+        hours = {int(hour) % 24 for hour in _HOUR.findall(match.group(1))}
+        skip_hours = tuple(sorted(hours))
+    return ttl, skip_hours
+
+
+def next_interval(previous, new_items, elapsed=None, ttl=None):
+    """Work out a feed's next poll interval in seconds.
+
+    `previous` is the current interval (None for a feed never scheduled),
+    `new_items` how many unseen articles the poll found (None when there was
+    nothing to compare against, which keeps the interval) and `elapsed` the
+    seconds since the feed was last polled.
+    """
+    interval = previous or DEFAULT_INTERVAL
+    if new_items is None:
+        pass
+    elif new_items:
+        interval /= 2
+        if elapsed:
+            # Aim for roughly one new article per poll
+            interval = min(interval, elapsed / new_items)
+    else:
+        interval *= BACKOFF
+    if ttl:
+        interval = max(interval, ttl * 60)
+    return int(min(max(interval, MIN_INTERVAL), MAX_INTERVAL))
+
+
+def next_poll_time(now, interval, skip_hours=(), jitter=JITTER, rng=random):
+    """Return when to poll next, jittered and moved out of skipped hours.
+
+    `now` is a naive local datetime, like the other timestamps we store;
+    `skip_hours` are GMT hours as RSS defines them.
+    """
+    when = now + timedelta(seconds=interval * rng.uniform(1 - jitter, 1 + jitter))
+    if skip_hours:
+        skip = set(skip_hours)
+        for _ in range(24):
+            if when.astimezone(timezone.utc).hour not in skip:
+                break
+            when = when.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return when
+
+
+def encode_skip_hours(skip_hours):
+    return ','.join(str(hour) for hour in skip_hours) or None
+
+
+def decode_skip_hours(value):
+    return tuple(int(hour) for hour in value.split(',')) if value else ()
@@ -0,0 +1,227 @@
+"""
+Bulletin script generation.
+
+A bulletin is produced as a stream of segments (an intro, one per story and
+an outro) by iter_script_segments(). Writers turn segments into plain text,
+Markdown, JSON or SSML and write each one straight to a file-like object as
+it arrives, so a script can go to a file, stdout or the UI without first
+being assembled in memory.
+
+    with open('bulletin.ssml', 'w') as out:
+        write_script(iter_script_segments(articles), out, 'ssml')
+
+Summaries are the expensive part of a story, so they come from
+summary_cache: a story is only summarized again when its text changes, and
+stories the poller has already seen are usually summarized ahead of time.
+"""
+
+import io
+import json
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from . import metrics
+from .dedup import cluster_articles
+from .summarizer import summarize
+from .summary_cache import summarize_cached
+
+NO_DETAILS = "Details are still emerging on this story."
+
+
+# Generate summary (simplified version)
+def generate_summary(text, max_sentences=3):
+    """Simple extractive summarization"""
+    return summarize(text, max_sentences)
+
+
+def _join_names(names):
+    return names[0] if len(names) == 1 else f"{', '.join(names[:-1])} and {names[-1]}"
+
+
+def iter_script_segments(articles, summary_mode='compat', dedupe=True):
+    """Yield the segments of a bulletin for the selected articles.
+
+    Segments are dicts with a 'type' of 'intro', 'story' or 'outro'. Story
+    segments carry their 1-based 'number', 'title', spoken 'text', 'source',
+    'url', the other outlets in 'also_reported_by' and whether they are the
+    'last' story.
+
+    With `dedupe`, articles telling the same story are read once, from the
+    cluster's representative. Stories without a cached summary are
+    summarized together in one batch.
+    """
+    with metrics.timer('dedup'):
+        clusters = cluster_articles(articles) if dedupe else [[article] for article in articles]
+
+    yield {'type': 'intro', 'date': datetime.now().strftime('%B %d, %Y'), 'stories': len(clusters)}
+
+    contents = [cluster[0].get('content', '') or cluster[0].get('summary', '') for cluster in clusters]
+    summaries = summarize_cached(contents, mode=summary_mode)
+
+    for i, (cluster, content, summary) in enumerate(zip(clusters, contents, summaries), 1):
+        article = cluster[0]
+        others = list(dict.fromkeys(
+            other['source'] for other in cluster[1:]
+            if other.get('source') and other.get('source') != article.get('source')))
+        yield {
+            'type': 'story',
+            'number': i,
+            'title': article['title'],
+            'text': summary if content else NO_DETAILS,
+            'source': article.get('source'),
+            'url': article.get('url'),
+            'also_reported_by': others,
+            'last': i == len(clusters),
+        }
+
+    yield {'type': 'outro'}
+
+
+class ScriptWriter:
+    """Writes segments to `out` as they arrive; subclasses define the format"""
+
+    extension = '.txt'
+    mime = 'text/plain'
+
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, segment):
+        getattr(self, segment['type'])(segment)
+
+    def intro(self, segment):
+        pass
+
+    def story(self, segment):
+        pass
+
+    def outro(self, segment):
+        pass
+
+
+class TextWriter(ScriptWriter):
+    """The plain read-out script"""
+
+    def intro(self, segment):
+        self.out.write(f"Good evening, and welcome to the news. Today is {segment['date']}.\n\n")
+        self.out.write(f"In today's bulletin, we have {segment['stories']} stories for you.\n\n")
+
+    def story(self, segment):
+        write = self.out.write
+        write(f"--- Story {segment['number']} ---\n\n")
+        write(f"{segment['title']}\n\n")
+        write(segment['text'])
+        write("\n\n")
+        if segment['also_reported_by']:
+            write(f"This story is also being reported by {_join_names(segment['also_reported_by'])}.\n\n")
+        if not segment['last']:
+            write("Moving on to our next story...\n\n")
+
+    def outro(self, segment):
+        self.out.write("That concludes our news bulletin for today. Thank you for listening.")
+
+
+class MarkdownWriter(ScriptWriter):
+    extension = '.md'
+    mime = 'text/markdown'
+
+    def intro(self, segment):
+        self.out.write(f"# News Bulletin, {segment['date']}\n\n")
+        self.out.write(f"_{segment['stories']} stories_\n\n")
+
+    def story(self, segment):
+        write = self.out.write
+        write(f"## {segment['number']}. {segment['title']}\n\n")
+        write(f"{segment['text']}\n\n")
+        if segment['url']:
+            write(f"Source: [{segment['source'] or segment['url']}]({segment['url']})\n\n")
+        if segment['also_reported_by']:
+            write(f"_Also reported by {_join_names(segment['also_reported_by'])}._\n\n")
+
+    def outro(self, segment):
+        self.out.write("---\n\nThat concludes our news bulletin for today. Thank you for listening.\n")
+
+
+class JSONWriter(ScriptWriter):
+    """A JSON document with the date and a list of stories, written incrementally"""
+
+    extension = '.json'
+    mime = 'application/json'
+
+    def intro(self, segment):
+        self.out.write('{"date": %s, "stories": [' % json.dumps(segment['date']))
+        self.first = True
+
+    def story(self, segment):
+        if not self.first:
+            self.out.write(', ')
+        self.first = False
+        story = {key: value for key, value in segment.items() if key not in ('type', 'last')}
+        self.out.write(json.dumps(story, ensure_ascii=False))
+
+    def outro(self, segment):
+        self.out.write(']}\n')
+
+
+class SSMLWriter(ScriptWriter):
+    """Speech Synthesis Markup for text-to-speech engines"""
+
+    extension = '.ssml'
+    mime = 'application/ssml+xml'
+
+    def intro(self, segment):
+        self.out.write('<?xml version="1.0" encoding="UTF-8"?>\n<speak version="1.0" '
+                       'xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">\n')
+        self.out.write(f"<p>Good evening, and welcome to the news. Today is {escape(segment['date'])}.</p>\n")
+        self.out.write(f"<p>In today's bulletin, we have {segment['stories']} stories for you.</p>\n"
+                       '<break time="700ms"/>\n')
+
+    def story(self, segment):
+        write = self.out.write
+        write(f"<p><emphasis level=\"moderate\">{escape(segment['title'])}</emphasis></p>\n")
+        write(f"<p>{escape(segment['text'])}</p>\n")
+        if segment['also_reported_by']:
+            names = escape(_join_names(segment['also_reported_by']))
+            write(f"<p>This story is also being reported by {names}.</p>\n")
+        if not segment['last']:
+            write('<break time="1s"/>\n<p>Moving on to our next story.</p>\n')
+
+    def outro(self, segment):
+        self.out.write('<break time="700ms"/>\n'
+                       '<p>That concludes our news bulletin for today. Thank you for listening.</p>\n'
+                       '</speak>\n')
+
+
+WRITERS = {
+    'text': TextWriter,
+    'markdown': MarkdownWriter,
+    'json': JSONWriter,
+    'ssml': SSMLWriter,
+}
+
+
+def write_script(segments, out, fmt='text'):
+    """Write segments to the file-like `out` in `fmt`, one at a time"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown script format {fmt!r}, expected one of {tuple(WRITERS)}")
+    writer = WRITERS[fmt](out)
+    for segment in segments:
+        writer.write(segment)
+
+
+def render_script(segments, fmt='text'):
+    """Return the whole script in `fmt` as one string"""
+    out = io.StringIO()
+    write_script(segments, out, fmt)
+    return out.getvalue()
+
+
+# Generate news script
+@metrics.timed('script')
+def generate_news_script(articles, summary_mode='compat', dedupe=True):
+    """Generate a news readout script from selected articles.
+
+    With `dedupe`, articles telling the same story are read once, from the
+    cluster's representative, and the other outlets carrying it are named.
+    """
+    return render_script(iter_script_segments(articles, summary_mode, dedupe))
@@ -0,0 +1,736 @@
+"""
+SQLite storage for feeds and cached articles.
+
+Connections are pooled and reused across calls, threads and Streamlit
+reruns. Each one runs in WAL mode so readers never block the writer, and
+sqlite3 keeps its prepared statements cached per connection. The schema is
+migrated once per database file and tracked with PRAGMA user_version, so
+opening the app no longer inspects the tables on every rerun.
+"""
+
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from . import metrics
+from .feed_stream import parse_timestamp
+
+DB_PATH = 'rss_feeds.db'
+
+# Idle connections kept open for reuse
+POOL_SIZE = 8
+
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+)
+
+
+# Database setup with datetime adapter fix
+def adapt_datetime(ts):
+    return ts.isoformat()
+
+def convert_datetime(ts):
+    return datetime.fromisoformat(ts.decode())
+
+sqlite3.register_adapter(datetime, adapt_datetime)
+sqlite3.register_converter("timestamp", convert_datetime)
+
+
+def _add_column(conn, table, column, decl):
+    """Add a column unless an older copy of the schema already has it"""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        return True
+    return False
+
+
+def _migrate_v1(conn):
+    """Original schema, including columns added to early databases"""
+    conn.execute('''CREATE TABLE IF NOT EXISTS rss_feeds
+                    (domain TEXT PRIMARY KEY,
+                     rss_url TEXT,
+                     display_name TEXT,
+                     last_checked TIMESTAMP,
+                     last_success TIMESTAMP,
+                     is_active INTEGER DEFAULT 0)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS article_cache
+                    (url_hash TEXT PRIMARY KEY,
+                     url TEXT,
+                     title TEXT,
+                     content TEXT,
+                     summary TEXT,
+                     published TIMESTAMP,
+                     fetched TIMESTAMP)''')
+    if _add_column(conn, 'rss_feeds', 'display_name', 'TEXT'):
+        # Update existing rows with a default display name
+        conn.execute("UPDATE rss_feeds SET display_name = domain WHERE display_name IS NULL")
+    _add_column(conn, 'rss_feeds', 'is_active', 'INTEGER DEFAULT 0')
+
+
+def _migrate_v2(conn):
+    """HTTP validators and the persistent article store"""
+    _add_column(conn, 'rss_feeds', 'etag', 'TEXT')
+    _add_column(conn, 'rss_feeds', 'last_modified', 'TEXT')
+    _add_column(conn, 'article_cache', 'source', 'TEXT')
+    _add_column(conn, 'article_cache', 'position', 'INTEGER')
+    _add_column(conn, 'article_cache', 'entry_hash', 'TEXT')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_article_cache_source ON article_cache (source, position)")
+
+
+def _migrate_v3(conn):
+    """Per-feed polling schedule"""
+    _add_column(conn, 'rss_feeds', 'poll_interval', 'INTEGER')
+    _add_column(conn, 'rss_feeds', 'next_poll', 'TIMESTAMP')
+    _add_column(conn, 'rss_feeds', 'ttl', 'INTEGER')
+    _add_column(conn, 'rss_feeds', 'skip_hours', 'TEXT')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rss_feeds_next_poll ON rss_feeds (next_poll)")
+
+
+def _migrate_v4(conn):
+    """Full-text search index over stored articles.
+
+    article_search is an external-content FTS5 table: it indexes
+    article_cache's text without storing a second copy, and triggers keep it
+    in step row by row. It is keyed on article_cache's implicit rowid, which
+    VACUUM may renumber, so run rebuild_search_index() after a VACUUM.
+    """
+    conn.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS article_search USING fts5
+                    (title, summary, content,
+                     content = 'article_cache', content_rowid = 'rowid',
+                     tokenize = 'porter unicode61 remove_diacritics 2')""")
+    # Title matches count most, then the summary, then the body
+    conn.execute("INSERT INTO article_search (article_search, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS article_search_insert
+                    AFTER INSERT ON article_cache BEGIN
+                        INSERT INTO article_search (rowid, title, summary, content)
+                        VALUES (new.rowid, new.title, new.summary, new.content);
+                    END""")
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS article_search_delete
+                    AFTER DELETE ON article_cache BEGIN
+                        INSERT INTO article_search (article_search, rowid, title, summary, content)
+                        VALUES ('delete', old.rowid, old.title, old.summary, old.content);
+                    END""")
+    # Refetches rewrite every column; only reindex when the text changed
+    conn.execute("""CREATE TRIGGER IF NOT EXISTS article_search_update
+                    AFTER UPDATE OF title, summary, content ON article_cache
+                    WHEN old.title IS NOT new.title
+                      OR old.summary IS NOT new.summary
+                      OR old.content IS NOT new.content BEGIN
+                        INSERT INTO article_search (article_search, rowid, title, summary, content)
+                        VALUES ('delete', old.rowid, old.title, old.summary, old.content);
+                        INSERT INTO article_search (rowid, title, summary, content)
+                        VALUES (new.rowid, new.title, new.summary, new.content);
+                    END""")
+    # Index what's already stored
+    conn.execute("INSERT INTO article_search (article_search) VALUES ('rebuild')")
+
+
+def _migrate_v5(conn):
+    """Summaries keyed by a hash of the text and summarizer settings"""
+    conn.execute("""CREATE TABLE IF NOT EXISTS summary_cache
+                    (key TEXT PRIMARY KEY,
+                     summary TEXT NOT NULL,
+                     used TIMESTAMP)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_summary_cache_used ON summary_cache (used)")
+
+
+def _migrate_v6(conn):
+    """When each article's own page was fetched for its full text"""
+    _add_column(conn, 'article_cache', 'body_fetched', 'TIMESTAMP')
+
+
+def _migrate_v7(conn):
+    """Per-feed health for the circuit breaker"""
+    _add_column(conn, 'rss_feeds', 'failures', 'INTEGER DEFAULT 0')
+    _add_column(conn, 'rss_feeds', 'last_error', 'TEXT')
+    _add_column(conn, 'rss_feeds', 'avg_latency', 'REAL')
+    _add_column(conn, 'rss_feeds', 'retry_after', 'TIMESTAMP')
+
+
+def _migrate_v8(conn):
+    """Publish times as UTC epoch seconds, for time-ordered queries across sources"""
+    if _add_column(conn, 'article_cache', 'published_ts', 'INTEGER'):
+        # Parse the raw dates already stored
+        rows = conn.execute("SELECT rowid, CAST(published AS TEXT) FROM article_cache").fetchall()
+        conn.executemany("UPDATE article_cache SET published_ts = ? WHERE rowid = ?",
+                         [(parse_timestamp(published), rowid) for rowid, published in rows
+                          if published])
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_article_cache_published_ts "
+                 "ON article_cache (published_ts)")
+
+
+def _migrate_v9(conn):
+    """Which articles each feed currently carries, keyed by (source, url_hash).
+
+    article_cache holds one row per article, so two feeds carrying the same
+    item (bbc.com and bbc.co.uk share a feed) used to take the row from each
+    other. Feed membership and order now live in feed_articles;
+    article_cache.source only records which feed stored the article last,
+    and article_cache.position is no longer used.
+    """
+    conn.execute("""CREATE TABLE IF NOT EXISTS feed_articles
+                    (source TEXT NOT NULL,
+                     url_hash TEXT NOT NULL,
+                     position INTEGER,
+                     PRIMARY KEY (source, url_hash))""")
+    conn.execute("""CREATE INDEX IF NOT EXISTS idx_feed_articles_position
+                    ON feed_articles (source, position)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_feed_articles_url_hash ON feed_articles (url_hash)")
+    conn.execute("""INSERT OR IGNORE INTO feed_articles (source, url_hash, position)
+                    SELECT source, url_hash, position FROM article_cache
+                    WHERE source IS NOT NULL""")
+
+
+# Applied in order; a database at user_version N has had the first N applied
+MIGRATIONS = [_migrate_v1, _migrate_v2, _migrate_v3, _migrate_v4, _migrate_v5, _migrate_v6,
+              _migrate_v7, _migrate_v8, _migrate_v9]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn):
+    """Bring a database up to SCHEMA_VERSION"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    with conn:
+        for step in MIGRATIONS[version:]:
+            step(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES,
+                           check_same_thread=False, cached_statements=256)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if path not in _migrated:
+        with _migrate_lock:
+            if path not in _migrated:
+                migrate(conn)
+                _migrated.add(path)
+    return conn
+
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection"""
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect(DB_PATH)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@contextmanager
+def transaction():
+    """Borrow a pooled connection and commit everything done with it at once"""
+    with connection() as conn:
+        with conn:
+            yield conn
+
+
+def close_all():
+    """Close pooled connections, e.g. before the database file is replaced"""
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+    _migrated.clear()
+
+
+def init_db():
+    """Make sure the database exists and is migrated"""
+    with connection():
+        pass
+
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+# Get all cached feeds
+@metrics.timed('db.get_cached_feeds')
+def get_cached_feeds():
+    with connection() as conn:
+        try:
+            return conn.execute("""SELECT domain, rss_url, display_name, last_success, is_active
+                                   FROM rss_feeds
+                                   WHERE rss_url IS NOT NULL
+                                   ORDER BY display_name""").fetchall()
+        except sqlite3.OperationalError:
+            # If there's an error, return empty list
+            return []
+
+
+# Update feed active status
+def update_feed_active_status(domain, is_active):
+    set_feeds_active({domain: is_active})
+
+
+@metrics.timed('db.set_feeds_active')
+def set_feeds_active(changes):
+    """Apply a {domain: is_active} mapping in a single transaction"""
+    if not changes:
+        return
+    with transaction() as conn:
+        conn.executemany("UPDATE rss_feeds SET is_active = ? WHERE domain = ?",
+                         [(int(is_active), domain) for domain, is_active in changes.items()])
+
+
+@metrics.timed('db.get_active_sources')
+def get_active_sources():
+    """Domains currently ticked in the sidebar, in display order"""
+    with connection() as conn:
+        return [row[0] for row in conn.execute("""SELECT domain FROM rss_feeds
+                                                  WHERE is_active = 1 AND rss_url IS NOT NULL
+                                                  ORDER BY display_name""")]
+
+
+@metrics.timed('db.get_feed')
+def get_feed(domain):
+    """Return (rss_url, last_success) for a domain, or None"""
+    with connection() as conn:
+        return conn.execute("SELECT rss_url, last_success FROM rss_feeds WHERE domain = ?",
+                            (domain,)).fetchone()
+
+
+@metrics.timed('db.save_discovered_feed')
+def save_discovered_feed(domain, rss_url, display_name):
+    """Record the outcome of RSS discovery for a domain.
+
+    An existing source keeps its other settings (active state, poll
+    schedule); its validators and health are reset when the feed URL changes.
+    """
+    now = datetime.now()
+    with transaction() as conn:
+        conn.execute("""INSERT INTO rss_feeds
+                        (domain, rss_url, display_name, last_checked, last_success)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (domain) DO UPDATE SET
+                           display_name = excluded.display_name,
+                           last_checked = excluded.last_checked,
+                           last_success = excluded.last_success,
+                           etag = CASE WHEN rss_url IS excluded.rss_url THEN etag END,
+                           last_modified = CASE WHEN rss_url IS excluded.rss_url
+                                                THEN last_modified END,
+                           failures = CASE WHEN rss_url IS excluded.rss_url THEN failures ELSE 0 END,
+                           retry_after = CASE WHEN rss_url IS excluded.rss_url THEN retry_after END,
+                           last_error = CASE WHEN rss_url IS excluded.rss_url THEN last_error END,
+                           avg_latency = CASE WHEN rss_url IS excluded.rss_url THEN avg_latency END,
+                           rss_url = excluded.rss_url""",
+                     (domain, rss_url, display_name, now, now if rss_url else None))
+
+
+@metrics.timed('db.save_feeds')
+def save_feeds(feeds):
+    """Store imported (domain, rss_url, display_name, is_active) in one transaction.
+
+    An existing source keeps its articles; its validators and health are
+    reset when the feed URL changes. An is_active of None keeps the current
+    state (inactive for new sources).
+    """
+    if not feeds:
+        return
+    now = datetime.now()
+    with transaction() as conn:
+        conn.executemany("""INSERT INTO rss_feeds
+                            (domain, rss_url, display_name, last_checked, last_success, is_active)
+                            VALUES (?, ?, ?, ?, ?, COALESCE(?, 0))
+                            ON CONFLICT (domain) DO UPDATE SET
+                               display_name = excluded.display_name,
+                               last_checked = excluded.last_checked,
+                               last_success = excluded.last_success,
+                               is_active = COALESCE(?, is_active),
+                               etag = CASE WHEN rss_url IS excluded.rss_url THEN etag END,
+                               last_modified = CASE WHEN rss_url IS excluded.rss_url
+                                                    THEN last_modified END,
+                               failures = CASE WHEN rss_url IS excluded.rss_url THEN failures ELSE 0 END,
+                               retry_after = CASE WHEN rss_url IS excluded.rss_url THEN retry_after END,
+                               last_error = CASE WHEN rss_url IS excluded.rss_url THEN last_error END,
+                               avg_latency = CASE WHEN rss_url IS excluded.rss_url THEN avg_latency END,
+                               rss_url = excluded.rss_url""",
+                         [(domain, rss_url, display_name, now, now,
+                           None if is_active is None else int(is_active),
+                           None if is_active is None else int(is_active))
+                          for domain, rss_url, display_name, is_active in feeds])
+
+
+@metrics.timed('db.get_feed_urls')
+def get_feed_urls(domains):
+    """Return [(domain, rss_url)] for the given domains, in the order given"""
+    if not domains:
+        return []
+    with connection() as conn:
+        urls = dict(conn.execute(f"""SELECT domain, rss_url FROM rss_feeds
+                                     WHERE domain IN ({_placeholders(domains)})
+                                     AND rss_url IS NOT NULL""", list(domains)))
+    return [(domain, urls[domain]) for domain in domains if domain in urls]
+
+
+# Get stored HTTP validators for feeds that have cached articles to fall back on
+@metrics.timed('db.get_feed_validators')
+def get_feed_validators(domains):
+    if not domains:
+        return {}
+    with connection() as conn:
+        rows = conn.execute(f"""SELECT domain, etag, last_modified FROM rss_feeds
+                                WHERE domain IN ({_placeholders(domains)})
+                                AND (etag IS NOT NULL OR last_modified IS NOT NULL)
+                                AND EXISTS (SELECT 1 FROM feed_articles
+                                            WHERE source = rss_feeds.domain
+                                            AND position IS NOT NULL)""",
+                            list(domains)).fetchall()
+    return {domain: (etag, last_modified) for domain, etag, last_modified in rows}
+
+
+@metrics.timed('db.get_poll_state')
+def get_poll_state(domains):
+    """Return {domain: (poll_interval, last_checked, ttl, skip_hours)}"""
+    if not domains:
+        return {}
+    with connection() as conn:
+        rows = conn.execute(f"""SELECT domain, poll_interval, last_checked, ttl, skip_hours
+                                FROM rss_feeds
+                                WHERE domain IN ({_placeholders(domains)})""",
+                            list(domains)).fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+
+@metrics.timed('db.get_feed_health')
+def get_feed_health(domains):
+    """Return {domain: (failures, last_error, avg_latency, retry_after)}"""
+    if not domains:
+        return {}
+    with connection() as conn:
+        rows = conn.execute(f"""SELECT domain, failures, last_error, avg_latency, retry_after
+                                FROM rss_feeds
+                                WHERE domain IN ({_placeholders(domains)})""",
+                            list(domains)).fetchall()
+    return {row[0]: (row[1] or 0,) + row[2:] for row in rows}
+
+
+@metrics.timed('db.get_due_feeds')
+def get_due_feeds(now=None, limit=None):
+    """Return [(domain, rss_url)] for active feeds whose next poll has come, most overdue first"""
+    now = now or datetime.now()
+    with connection() as conn:
+        return conn.execute("""SELECT domain, rss_url FROM rss_feeds
+                               WHERE is_active = 1 AND rss_url IS NOT NULL
+                               AND (next_poll IS NULL OR next_poll <= ?)
+                               ORDER BY next_poll IS NOT NULL, next_poll
+                               LIMIT ?""", (now, -1 if limit is None else limit)).fetchall()
+
+
+@metrics.timed('db.get_next_poll')
+def get_next_poll():
+    """When the next active feed falls due, or None if none are scheduled"""
+    with connection() as conn:
+        row = conn.execute("""SELECT MIN(next_poll) FROM rss_feeds
+                              WHERE is_active = 1 AND rss_url IS NOT NULL""").fetchone()
+    # MIN() drops the declared type, so the converter doesn't run
+    return datetime.fromisoformat(row[0]) if row[0] else None
+
+
+def _save_poll(conn, domain, succeeded, poll_interval, next_poll, ttl, skip_hours, now):
+    # A failed poll leaves the feed's last advertised ttl/skipHours in place
+    conn.execute("""UPDATE rss_feeds SET
+                        last_checked = ?,
+                        last_success = CASE WHEN ? THEN ? ELSE last_success END,
+                        poll_interval = ?,
+                        next_poll = ?,
+                        ttl = CASE WHEN ? THEN ? ELSE ttl END,
+                        skip_hours = CASE WHEN ? THEN ? ELSE skip_hours END
+                    WHERE domain = ?""",
+                 (now, succeeded, now, poll_interval, next_poll,
+                  succeeded, ttl, succeeded, skip_hours, domain))
+
+
+def _save_health(conn, domain, failures, last_error, avg_latency, retry_after):
+    conn.execute("""UPDATE rss_feeds SET failures = ?, last_error = ?, avg_latency = ?,
+                                         retry_after = ?
+                    WHERE domain = ?""",
+                 (failures, last_error, avg_latency, retry_after, domain))
+
+
+def _upsert_feed_articles(conn, domain, articles, etag, last_modified, now):
+    conn.execute("UPDATE feed_articles SET position = NULL WHERE source = ?", (domain,))
+    conn.executemany("""INSERT INTO article_cache
+                        (url_hash, url, title, content, summary, published, published_ts,
+                         fetched, source, entry_hash)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (url_hash) DO UPDATE SET
+                           url = excluded.url,
+                           title = excluded.title,
+                           -- Keep full text extracted from the article's page
+                           content = CASE WHEN body_fetched IS NULL
+                                          THEN excluded.content ELSE content END,
+                           summary = excluded.summary,
+                           published = excluded.published,
+                           published_ts = excluded.published_ts,
+                           fetched = excluded.fetched,
+                           source = excluded.source,
+                           entry_hash = excluded.entry_hash""",
+                     [(article['url_hash'], article['url'], article['title'],
+                       article['content'], article['summary'], article['published'],
+                       article.get('published_ts'), now, domain, article.get('entry_hash'))
+                      for article in articles])
+    conn.executemany("""INSERT INTO feed_articles (source, url_hash, position) VALUES (?, ?, ?)
+                        ON CONFLICT (source, url_hash) DO UPDATE SET position = excluded.position""",
+                     [(domain, article['url_hash'], i) for i, article in enumerate(articles)])
+    conn.execute("UPDATE rss_feeds SET etag = ?, last_modified = ? WHERE domain = ?",
+                 (etag, last_modified, domain))
+
+
+# Store a feed's current articles along with its new validators
+def save_feed_articles(domain, articles, etag, last_modified):
+    """Upsert a feed's articles into article_cache in one transaction.
+
+    Rows are keyed by url_hash, so articles seen before are updated in place,
+    and the feed's current set is kept per source in feed_articles.
+    Articles that have dropped out of the feed stay in the store but lose
+    their `position`, which marks them as no longer part of the current set.
+    """
+    save_fetch_results([(domain, articles, etag, last_modified)])
+
+
+@metrics.timed('db.save_fetch_results')
+def save_fetch_results(results, polls=(), health=()):
+    """Store several feeds' (domain, articles, etag, last_modified) in one transaction.
+
+    `polls` holds (domain, succeeded, poll_interval, next_poll, ttl,
+    skip_hours) for every feed that was polled, changed or not, and
+    `health` holds (domain, failures, last_error, avg_latency, retry_after);
+    both are saved in the same transaction.
+    """
+    if not results and not polls and not health:
+        return
+    now = datetime.now()
+    with transaction() as conn:
+        for domain, articles, etag, last_modified in results:
+            _upsert_feed_articles(conn, domain, articles, etag, last_modified, now)
+        for poll in polls:
+            _save_poll(conn, *poll, now)
+        for feed_health in health:
+            _save_health(conn, *feed_health)
+
+
+# Load the current article sets stored for several feeds
+@metrics.timed('db.get_cached_articles_by_source')
+def get_cached_articles_by_source(domains):
+    """Return {domain: [article, ...]} in feed order"""
+    by_source = {domain: [] for domain in domains}
+    if not domains:
+        return by_source
+    with connection() as conn:
+        # CAST drops the TIMESTAMP declared type: `published` holds the
+        # feed's raw date string, which the converter can't parse
+        rows = conn.execute(f"""SELECT f.source, a.url_hash, a.entry_hash, a.title, a.url,
+                                       CAST(a.published AS TEXT), a.published_ts, a.summary,
+                                       a.content
+                                FROM feed_articles AS f
+                                JOIN article_cache AS a ON a.url_hash = f.url_hash
+                                WHERE f.source IN ({_placeholders(domains)})
+                                AND f.position IS NOT NULL
+                                ORDER BY f.source, f.position""", list(domains)).fetchall()
+    for source, url_hash, entry_hash, title, url, published, published_ts, summary, content in rows:
+        by_source[source].append({
+            'title': title, 'url': url, 'published': published or '',
+            'published_ts': published_ts, 'summary': summary or '', 'content': content or '',
+            'url_hash': url_hash, 'entry_hash': entry_hash,
+        })
+    return by_source
+
+
+def get_cached_articles(domain):
+    return get_cached_articles_by_source([domain])[domain]
+
+
+# Load the stored articles for several sources, tagged with their source
+def load_stored_articles(domains):
+    by_source = get_cached_articles_by_source(domains)
+    all_articles = []
+    for domain in domains:
+        for article in by_source[domain]:
+            article['source'] = domain
+            all_articles.append(article)
+    return all_articles
+
+
+_SEARCH_TERM = re.compile(r'\w+')
+
+
+def _search_query(text):
+    """Turn free text into an FTS5 query matching every word.
+
+    Each word is quoted so punctuation in the search box can't be read as
+    query syntax.
+    """
+    terms = _SEARCH_TERM.findall(text)
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+@metrics.timed('db.search_articles')
+def search_articles(text, domains=None, since=None, limit=50):
+    """Full-text search over every stored article, best matches first.
+
+    Ranked by bm25 with title matches weighted highest. `domains` limits the
+    sources searched and `since` (a datetime) drops articles last fetched
+    before it. Returns article dicts tagged with their source.
+    """
+    query = _search_query(text)
+    if query is None:
+        return []
+
+    sql = """SELECT a.source, a.url_hash, a.entry_hash, a.title, a.url,
+                    CAST(a.published AS TEXT), a.published_ts, a.summary, a.content
+             FROM article_search
+             JOIN article_cache AS a ON a.rowid = article_search.rowid
+             WHERE article_search MATCH ?"""
+    params = [query]
+    if domains:
+        sql += f""" AND a.url_hash IN (SELECT url_hash FROM feed_articles
+                                        WHERE source IN ({_placeholders(domains)}))"""
+        params.extend(domains)
+    if since is not None:
+        sql += " AND a.fetched >= ?"
+        params.append(since)
+    sql += " ORDER BY article_search.rank LIMIT ?"
+    params.append(limit)
+
+    with connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [{
+        'title': title, 'url': url, 'published': published or '', 'published_ts': published_ts,
+        'summary': summary or '', 'content': content or '',
+        'url_hash': url_hash, 'entry_hash': entry_hash, 'source': source,
+    } for source, url_hash, entry_hash, title, url, published, published_ts, summary, content in rows]
+
+
+@metrics.timed('db.get_timeline')
+def get_timeline(since, until=None, domains=None, limit=200):
+    """Stored articles published between `since` and `until` (UTC epoch seconds), newest first.
+
+    A range scan on the published_ts index. `domains` limits the sources;
+    articles that have dropped out of their feed are included. The dicts
+    carry no content.
+    """
+    sql = """SELECT source, url_hash, title, url, CAST(published AS TEXT), published_ts, summary
+             FROM article_cache
+             WHERE published_ts >= ?"""
+    params = [since]
+    if until is not None:
+        sql += " AND published_ts < ?"
+        params.append(until)
+    if domains:
+        sql += f""" AND url_hash IN (SELECT url_hash FROM feed_articles
+                                      WHERE source IN ({_placeholders(domains)}))"""
+        params.extend(domains)
+    sql += " ORDER BY published_ts DESC LIMIT ?"
+    params.append(limit)
+
+    with connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [{
+        'title': title, 'url': url, 'published': published or '', 'published_ts': published_ts,
+        'summary': summary or '', 'url_hash': url_hash, 'source': source,
+    } for source, url_hash, title, url, published, published_ts, summary in rows]
+
+
+def rebuild_search_index():
+    """Reindex every stored article from scratch, e.g. after a VACUUM"""
+    with transaction() as conn:
+        conn.execute("INSERT INTO article_search (article_search) VALUES ('rebuild')")
+
+
+@metrics.timed('db.get_summaries')
+def get_summaries(keys):
+    """Return {key: summary} for the stored keys, marking them recently used"""
+    if not keys:
+        return {}
+    with transaction() as conn:
+        found = dict(conn.execute(f"""SELECT key, summary FROM summary_cache
+                                      WHERE key IN ({_placeholders(keys)})""", list(keys)))
+        if found:
+            conn.execute(f"UPDATE summary_cache SET used = ? WHERE key IN ({_placeholders(found)})",
+                         [datetime.now(), *found])
+    return found
+
+
+@metrics.timed('db.save_summaries')
+def save_summaries(items, max_rows=None):
+    """Store (key, summary) pairs, then keep only the `max_rows` most recently used"""
+    if not items:
+        return
+    now = datetime.now()
+    with transaction() as conn:
+        conn.executemany("INSERT OR REPLACE INTO summary_cache (key, summary, used) VALUES (?, ?, ?)",
+                         [(key, summary, now) for key, summary in items])
+        if max_rows is not None:
+            conn.execute("""DELETE FROM summary_cache WHERE key IN
+                            (SELECT key FROM summary_cache ORDER BY used DESC LIMIT -1 OFFSET ?)""",
+                         (max_rows,))
+
+
+@metrics.timed('db.get_article_texts')
+def get_article_texts(url_hashes):
+    """Return {url_hash: (summary, content)} for the stored articles"""
+    if not url_hashes:
+        return {}
+    with connection() as conn:
+        rows = conn.execute(f"""SELECT url_hash, summary, content FROM article_cache
+                                WHERE url_hash IN ({_placeholders(url_hashes)})""",
+                            list(url_hashes))
+        return {url_hash: (summary or '', content or '') for url_hash, summary, content in rows}
+
+
+@metrics.timed('db.get_article_bodies')
+def get_article_bodies(url_hashes):
+    """Return {url_hash: content} for the articles whose page has been fetched"""
+    if not url_hashes:
+        return {}
+    with connection() as conn:
+        return dict(conn.execute(f"""SELECT url_hash, content FROM article_cache
+                                     WHERE url_hash IN ({_placeholders(url_hashes)})
+                                     AND body_fetched IS NOT NULL""", list(url_hashes)))
+
+
+@metrics.timed('db.save_article_bodies')
+def save_article_bodies(bodies):
+    """Store (url_hash, text) extracted from article pages as their content.
+
+    A text of None only records that the page was fetched, keeping the
+    feed's content.
+    """
+    if not bodies:
+        return
+    now = datetime.now()
+    with transaction() as conn:
+        conn.executemany("""UPDATE article_cache SET content = COALESCE(?, content), body_fetched = ?
+                            WHERE url_hash = ?""",
+                         [(text, now, url_hash) for url_hash, text in bodies])
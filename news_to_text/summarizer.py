@@ -0,0 +1,117 @@
+"""
+Batched extractive summarizer.
+
+All articles in a bulletin are tokenized once into a single sparse
+sentence-by-term matrix, and sentences are scored with sparse matrix
+products instead of per-sentence Python loops.
+
+Two scoring modes are available:
+
+- 'compat' reproduces the original generate_summary() output exactly:
+  a sentence scores the average in-article frequency of its words.
+- 'tfidf' weights each word's in-article frequency by its inverse document
+  frequency across the batch, so words every story shares (e.g. "said")
+  count for less.
+"""
+
+import re
+
+SUMMARY_MODES = ('compat', 'tfidf')
+
+_SENTENCE_SPLIT = re.compile(r'[.!?]+')
+
+
+def split_sentences(text):
+    """Split text into the candidate sentences the summarizer ranks"""
+    sentences = (s.strip() for s in _SENTENCE_SPLIT.split(text))
+    return [s for s in sentences if len(s) > 20]
+
+
+def summarize_batch(texts, max_sentences=3, mode='compat'):
+    """Summarize several texts at once, returning one summary per text"""
+    if mode not in SUMMARY_MODES:
+        raise ValueError(f"Unknown summary mode {mode!r}, expected one of {SUMMARY_MODES}")
+
+    import numpy as np
+    from scipy import sparse
+
+    summaries = [''] * len(texts)
+    # Per unique sentence: its text, token length, scored word count,
+    # owning document and how many times it occurs in that document
+    sentence_text, sentence_length, sentence_terms, sentence_doc = [], [], [], []
+    sentence_weight = []
+    # Every scored word of every unique sentence, in order
+    words = []
+    doc_ranges = []
+
+    for doc, text in enumerate(texts):
+        if not text:
+            continue
+        sentences = split_sentences(text)
+        if len(sentences) <= max_sentences:
+            summaries[doc] = ' '.join(sentences) + '.'
+            continue
+
+        # Repeated sentences are scored once, at their first position
+        counts = {}
+        for sentence in sentences:
+            counts[sentence] = counts.get(sentence, 0) + 1
+
+        start = len(sentence_text)
+        for sentence, count in counts.items():
+            tokens = sentence.lower().split()
+            scored = [word for word in tokens if len(word) > 3]  # Skip short words
+            words.extend(scored)
+            sentence_text.append(sentence)
+            sentence_length.append(len(tokens))
+            sentence_terms.append(len(scored))
+            sentence_doc.append(doc)
+            sentence_weight.append(count)
+        doc_ranges.append((doc, start, len(sentence_text)))
+
+    if not doc_ranges:
+        return summaries
+
+    n_sentences = len(sentence_text)
+    vocabulary = {word: i for i, word in enumerate(dict.fromkeys(words))}
+    rows = np.repeat(np.arange(n_sentences), sentence_terms)
+    cols = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.int64, count=len(words))
+    # Sentence x term occurrence counts
+    terms = sparse.csr_matrix(
+        (np.ones(len(words), dtype=np.int64), (rows, cols)),
+        shape=(n_sentences, len(vocabulary)),
+    )
+    terms.sum_duplicates()
+
+    # Document x sentence matrix, weighted by how often each sentence repeats
+    docs = sparse.csr_matrix(
+        (np.asarray(sentence_weight, dtype=np.int64), (sentence_doc, np.arange(n_sentences))),
+        shape=(len(texts), n_sentences),
+    )
+    # Document x term frequencies
+    frequencies = (docs @ terms).tocsr()
+
+    if mode == 'tfidf':
+        # Smoothed IDF over the documents being summarized
+        n_docs = len(doc_ranges)
+        document_frequency = np.bincount(frequencies.indices, minlength=len(vocabulary))
+        idf = np.log((1 + n_docs) / (1 + document_frequency)) + 1
+        frequencies = frequencies.multiply(idf).tocsr()
+
+    # Each sentence's summed word weights, taken from its own document
+    scores = np.asarray(terms.multiply(frequencies[sentence_doc]).sum(axis=1)).ravel()
+    lengths = np.asarray(sentence_length, dtype=np.float64)
+    scores = np.divide(scores, lengths, out=np.zeros(n_sentences), where=lengths > 0)
+
+    for doc, start, end in doc_ranges:
+        # Stable sort keeps earlier sentences first among equal scores
+        top = np.argsort(-scores[start:end], kind='stable')[:max_sentences]
+        top.sort()
+        summaries[doc] = ' '.join(sentence_text[start + i] for i in top) + '.'
+
+    return summaries
+
+
+def summarize(text, max_sentences=3, mode='compat'):
+    """Summarize a single text"""
+    return summarize_batch([text], max_sentences, mode)[0]
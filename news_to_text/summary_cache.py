@@ -0,0 +1,91 @@
+"""
+Two-tier cache of story summaries.
+
+Summaries are keyed by a hash of the text and everything that affects the
+result (summary mode, sentence count and SUMMARIZER_VERSION), so an article
+is only summarized again when its content or the summarizer changes. Hits
+come from an in-process LRU first, then from the summary_cache table, which
+survives restarts and is shared with the poller. The table is trimmed to
+the MAX_STORED most recently used summaries.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from . import metrics, storage, workers
+from .summarizer import summarize_batch
+
+# Bump when the summarizer's output changes, so stale summaries aren't reused
+SUMMARIZER_VERSION = 1
+
+# Summaries kept in memory, and in the database
+LRU_SIZE = 4096
+MAX_STORED = 50000
+
+_lru = OrderedDict()
+_lock = threading.Lock()
+
+
+def summary_key(text, max_sentences=3, mode='compat'):
+    return hashlib.md5(f'{SUMMARIZER_VERSION}\x00{mode}\x00{max_sentences}\x00{text}'.encode()).hexdigest()
+
+
+def _remember(items):
+    with _lock:
+        for key, summary in items:
+            _lru[key] = summary
+            _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def clear_memory():
+    """Empty the in-process tier (the stored summaries are kept)"""
+    with _lock:
+        _lru.clear()
+
+
+def summarize_cached(texts, max_sentences=3, mode='compat', processes=None):
+    """Summarize texts like summarize_batch(), reusing cached summaries.
+
+    Texts missing from both tiers are summarized together in one batch and
+    stored, in worker processes when `processes` is given (see workers.py).
+    (A cached 'tfidf' summary keeps the weights of the batch it was first
+    computed in.)
+    """
+    keys = [summary_key(text, max_sentences, mode) if text else None for text in texts]
+
+    found = {}
+    with _lock:
+        for key in keys:
+            if key in _lru:
+                _lru.move_to_end(key)
+                found[key] = _lru[key]
+    wanted = [key for key in dict.fromkeys(keys) if key and key not in found]
+    if wanted:
+        stored = storage.get_summaries(wanted)
+        _remember(stored.items())
+        found.update(stored)
+
+    missing = {key: text for key, text in zip(keys, texts) if key and key not in found}
+    metrics.count('summary_cache.hits', sum(1 for key in keys if key and key not in missing))
+    metrics.count('summary_cache.misses', len(missing))
+    if missing:
+        with metrics.timer('summarize'):
+            if processes is None:
+                batch = summarize_batch(list(missing.values()), max_sentences, mode)
+            else:
+                batch = workers.summarize_in_pool(list(missing.values()), max_sentences, mode, processes)
+        computed = list(zip(missing, batch))
+        storage.save_summaries(computed, MAX_STORED)
+        _remember(computed)
+        found.update(computed)
+
+    return [found[key] if key else '' for key in keys]
+
+
+def precompute(articles, max_sentences=3, mode='compat', processes=None):
+    """Summarize articles ahead of script generation"""
+    summarize_cached([article.get('content', '') or article.get('summary', '') for article in articles],
+                     max_sentences, mode, processes)
@@ -0,0 +1,158 @@
+"""
+Fast HTML-to-text cleaning for feed entries.
+
+html_to_text() returns exactly what
+BeautifulSoup(markup, 'html.parser').get_text(separator=' ', strip=True)
+would, but streams the markup through html.parser without building a tree,
+and skips parsing entirely when there is no markup to remove.
+"""
+
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+
+# get_text() leaves out strings inside these elements
+HIDDEN_TEXT_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+# Elements BeautifulSoup closes as soon as they open
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+    'link', 'menuitem', 'meta', 'param', 'source', 'track', 'wbr',
+    'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid',
+    'spacer',
+])
+
+_DECIMAL_REF = re.compile(r'^([0-9]+)(.*)', re.S)
+_HEX_REF = re.compile(r'^([0-9a-f]+)(.*)', re.S)
+
+
+def _numeric_character(number):
+    """Resolve a numeric character reference the way BeautifulSoup does"""
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return '\ufffd'
+    if 0x80 <= number <= 0x9F:
+        # References written in Windows-1252 rather than Unicode
+        try:
+            return bytes([number]).decode('cp1252')
+        except UnicodeDecodeError:
+            pass
+    return chr(number)
+
+
+class _TextExtractor(HTMLParser):
+    """Collects the stripped text strings BeautifulSoup would put in its tree"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.strings = []
+        self._data = []
+        self._open_tags = []
+        self._hidden = 0
+        # Void elements opened without "/>"; a later end tag for one is ignored
+        self._closed_void_tags = []
+
+    def _end_data(self):
+        if self._data:
+            text = ''.join(self._data).strip()
+            self._data = []
+            if text and not self._hidden:
+                self.strings.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._end_data()
+        if tag in VOID_TAGS:
+            self._closed_void_tags.append(tag)
+            return
+        self._open_tags.append(tag)
+        if tag in HIDDEN_TEXT_TAGS:
+            self._hidden += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <tag/> opens and immediately closes, leaving nothing on the stack
+        self._end_data()
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void_tags:
+            self._closed_void_tags.remove(tag)
+            return
+        self._end_data()
+        if tag not in self._open_tags:
+            return
+        # Like BeautifulSoup, close everything up to the matching open tag
+        while True:
+            closed = self._open_tags.pop()
+            if closed in HIDDEN_TEXT_TAGS:
+                self._hidden -= 1
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_entityref(self, name):
+        character = html5.get(name + ';')
+        self._data.append(character if character is not None else '&' + name)
+
+    def handle_charref(self, name):
+        if name[:1] in ('x', 'X'):
+            name, base, pattern = name[1:], 16, _HEX_REF
+        else:
+            base, pattern = 10, _DECIMAL_REF
+        extra = ''
+        try:
+            number = int(name, base)
+        except ValueError:
+            match = pattern.search(name)
+            if match is None:
+                self._data.append(name)
+                return
+            number, extra = int(match.group(1), base), match.group(2)
+        self._data.append(_numeric_character(number))
+        if extra:
+            self._data.append(extra)
+
+    def unknown_decl(self, data):
+        self._end_data()
+        # CDATA sections count as text; other declarations don't
+        if data.upper().startswith('CDATA['):
+            text = data[len('CDATA['):].strip()
+            if text:
+                self.strings.append(text)
+
+    def handle_comment(self, data):
+        self._end_data()
+
+    def handle_decl(self, decl):
+        self._end_data()
+
+    def handle_pi(self, data):
+        self._end_data()
+
+    def close(self):
+        super().close()
+        self._end_data()
+
+
+def html_to_text(markup):
+    """Strip tags and resolve entities, joining text fragments with spaces"""
+    if not markup:
+        return ''
+    # Plain text needs no parsing
+    if '<' not in markup and '&' not in markup:
+        return markup.strip()
+    parser = _TextExtractor()
+    parser.feed(markup)
+    parser.close()
+    return ' '.join(parser.strings)
+
+
+def clean_entry_text(content, summary):
+    """Clean an entry's content and summary together.
+
+    Many feeds repeat the same HTML as both description and content, so
+    identical inputs are only parsed once.
+    """
+    clean_content = html_to_text(content)
+    if summary == content:
+        return clean_content, clean_content
+    return clean_content, html_to_text(summary)
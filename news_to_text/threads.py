@@ -0,0 +1,44 @@
+"""
+Bounded thread pools for batches of blocking calls.
+
+Feed checks, discovery probes and page downloads all follow one pattern:
+run a call per item on a few threads, hand each result back as soon as it
+is ready, and give up on whatever is still running once the batch's time
+is up. run_in_threads() does that. Calls that miss the deadline are
+cancelled if they haven't started; ones already running are abandoned
+rather than waited for, since their own network timeouts bound them.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
+
+def run_in_threads(func, items, max_workers, total_timeout):
+    """Call `func(item)` for every item, yielding (item, result, error) as each finishes.
+
+    `error` is the exception the call raised, or None. Once `total_timeout`
+    seconds have passed, unfinished items are yielded with a TimeoutError.
+    Closing the generator early abandons the calls still in flight.
+    """
+    items = list(items)
+    if not items:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    futures = {executor.submit(func, item): item for item in items}
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=total_timeout):
+            pending.discard(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                yield futures[future], None, e
+            else:
+                yield futures[future], result, None
+    except FuturesTimeout:
+        error = TimeoutError(f"Timed out after {total_timeout}s")
+        # In submission order, so callers report them predictably
+        for future in [future for future in futures if future in pending]:
+            future.cancel()
+            yield futures[future], None, error
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,41 @@
+"""
+One newest-first timeline across sources.
+
+Publish times are stored as UTC epoch seconds in `published_ts`, so
+storage.get_timeline() answers "everything from the last two hours" with
+a range scan on its index. merge_timeline() does the same for articles
+already in memory: each source's list is sorted by publish time (feeds
+are nearly newest-first already, so this is close to linear) and the
+lists are combined with a k-way heap merge that stops at `since` or
+`limit`.
+"""
+
+import heapq
+import time
+from itertools import islice, takewhile
+
+
+def _published(article):
+    return article['published_ts']
+
+
+def window_start(hours, now=None):
+    """UTC epoch seconds `hours` before `now` (default: the current time)"""
+    return int((time.time() if now is None else now) - hours * 3600)
+
+
+def merge_timeline(by_source, since=None, limit=None):
+    """Articles from {source: [article, ...]} newest first, published at or after `since`.
+
+    Articles without a publish time are left out. Works on article dicts
+    and Article records alike.
+    """
+    runs = []
+    for articles in by_source.values():
+        dated = [article for article in articles if article.get('published_ts') is not None]
+        dated.sort(key=_published, reverse=True)
+        runs.append(dated)
+    merged = heapq.merge(*runs, key=_published, reverse=True)
+    if since is not None:
+        merged = takewhile(lambda article: article['published_ts'] >= since, merged)
+    return list(islice(merged, limit))
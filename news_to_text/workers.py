@@ -0,0 +1,79 @@
+"""
+Process pool for the CPU-bound parts of the pipeline.
+
+Downloads spend their time waiting on the network and run well on threads,
+but cleaning entry HTML, parsing malformed feeds with feedparser and
+summarizing are pure Python and hold the GIL. Given `processes`,
+fetch_all_feeds(), refresh_feeds() and summary_cache.summarize_cached()
+hand that work to a pool of worker processes instead: 0 means one per
+core.
+
+Only compact data crosses the process boundary: raw (content, summary)
+pairs go out and cleaned pairs come back. Small feeds are batched into
+tasks of up to BATCH_ENTRIES entries, so IPC costs stay small when many
+feeds arrive at once.
+
+The pool is started on first use and kept for the life of the process.
+It uses the 'spawn' start method, because forking a process that has
+download threads and open SQLite connections isn't safe.
+"""
+
+import os
+import threading
+from itertools import repeat
+
+# Most entries cleaned per task; smaller feeds are batched up to this
+BATCH_ENTRIES = 256
+
+# Texts summarized per task
+SUMMARY_BATCH = 64
+
+_pool = None
+_pool_size = None
+_lock = threading.Lock()
+
+
+def pool_size(processes=0):
+    return processes or os.cpu_count() or 1
+
+
+def get_pool(processes=0):
+    """Return the shared process pool, (re)starting it with `processes` workers"""
+    global _pool, _pool_size
+    size = pool_size(processes)
+    with _lock:
+        if _pool is None or _pool_size != size:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(size, mp_context=multiprocessing.get_context('spawn'))
+            _pool_size = size
+        return _pool
+
+
+def shutdown():
+    """Stop the worker processes; the next get_pool() starts new ones"""
+    global _pool, _pool_size
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = _pool_size = None
+
+
+def summarize_in_pool(texts, max_sentences=3, mode='compat', processes=0):
+    """summarize_batch() spread over the pool, returning summaries in order.
+
+    'tfidf' weights depend on the whole batch, so that mode runs as one
+    task, just off the calling process.
+    """
+    from .summarizer import summarize_batch
+
+    if mode == 'tfidf':
+        chunks = [texts]
+    else:
+        chunks = [texts[i:i + SUMMARY_BATCH] for i in range(0, len(texts), SUMMARY_BATCH)]
+    pool = get_pool(processes)
+    return [summary for chunk in pool.map(summarize_batch, chunks, repeat(max_sentences), repeat(mode))
+            for summary in chunk]
@@ -7,6 +7,8 @@ Run this script to clean and initialize your database.
 import sqlite3
 from datetime import datetime
 
+from news_to_text import storage
+
 # Known RSS feeds for major sites
 KNOWN_RSS_FEEDS = {
     'bbc.com': {
@@ -80,62 +82,51 @@ def reset_database():
     print("🗑️  Resetting database...")
     
     # Connect to database
-    conn = sqlite3.connect('rss_feeds.db')
+    conn = sqlite3.connect(storage.DB_PATH)
     c = conn.cursor()
     
     # Drop existing tables
     c.execute("DROP TABLE IF EXISTS rss_feeds")
     c.execute("DROP TABLE IF EXISTS article_cache")
+    c.execute("DROP TABLE IF EXISTS feed_articles")
+    c.execute("DROP TABLE IF EXISTS article_search")
+    c.execute("DROP TABLE IF EXISTS summary_cache")
+    c.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
     
-    # Create new tables with proper schema
-    c.execute('''CREATE TABLE rss_feeds
-                 (domain TEXT PRIMARY KEY, 
-                  rss_url TEXT,
-                  display_name TEXT,
-                  last_checked TIMESTAMP,
-                  last_success TIMESTAMP,
-                  is_active INTEGER DEFAULT 0)''')
-    
-    c.execute('''CREATE TABLE article_cache
-                 (url_hash TEXT PRIMARY KEY,
-                  url TEXT,
-                  title TEXT,
-                  content TEXT,
-                  summary TEXT,
-                  published TIMESTAMP,
-                  fetched TIMESTAMP)''')
+    # Create new tables with the app's current schema
+    storage.close_all()
+    storage.init_db()
     
     print("✅ Tables created")
     
     # Populate with known feeds
     print("\n📰 Adding known RSS feeds...")
     
-    for domain, feed_info in KNOWN_RSS_FEEDS.items():
-        try:
-            c.execute("""INSERT INTO rss_feeds 
-                         (domain, rss_url, display_name, last_checked, last_success, is_active) 
-                         VALUES (?, ?, ?, ?, ?, ?)""", 
-                      (domain, 
-                       feed_info['url'], 
-                       feed_info['name'],
-                       datetime.now(),
-                       datetime.now(),
-                       0))  # Start with all inactive
-            print(f"  ✓ Added {feed_info['name']} ({domain})")
-        except Exception as e:
-            print(f"  ✗ Error adding {domain}: {e}")
+    with storage.transaction() as conn:
+        c = conn.cursor()
+        for domain, feed_info in KNOWN_RSS_FEEDS.items():
+            try:
+                c.execute("""INSERT INTO rss_feeds 
+                             (domain, rss_url, display_name, last_checked, last_success, is_active) 
+                             VALUES (?, ?, ?, ?, ?, ?)""", 
+                          (domain, 
+                           feed_info['url'], 
+                           feed_info['name'],
+                           datetime.now(),
+                           datetime.now(),
+                           0))  # Start with all inactive
+                print(f"  ✓ Added {feed_info['name']} ({domain})")
+            except Exception as e:
+                print(f"  ✗ Error adding {domain}: {e}")
+        
+        # Show summary
+        c.execute("SELECT COUNT(*) FROM rss_feeds")
+        count = c.fetchone()[0]
     
-    # Commit changes
-    conn.commit()
-    
-    # Show summary
-    c.execute("SELECT COUNT(*) FROM rss_feeds")
-    count = c.fetchone()[0]
     print(f"\n✅ Database reset complete! Added {count} news sources.")
     
-    # Close connection
-    conn.close()
-    
     print("\n📌 To activate sources, select them in the Streamlit app sidebar.")
 
 if __name__ == "__main__":